@@ -0,0 +1 @@
+"""Benchmarks for the test harness, run against the local stand-in pages."""
@@ -0,0 +1,67 @@
+"""Compare timer-driven flows with real timers and with the fake clock.
+
+Usage::
+
+    python -m benchmarks.clock_benchmark [--repeat 3]
+"""
+import argparse
+import statistics
+import time
+
+from playwright.sync_api import expect, sync_playwright
+
+from utils.clock import FakeClock
+from utils.server import serve_directory
+
+
+def dynamic_loading(page, base_url, clock):
+    page.goto(base_url + "dynamic_loading.html")
+    page.locator("#start button").click()
+    if clock:
+        clock.tick(5000)
+    expect(page.locator("#finish h4")).to_have_text("Hello World!", timeout=10000)
+
+
+def entry_ad(page, base_url, clock):
+    page.goto(base_url + "entry_ad.html")
+    if clock:
+        page.wait_for_load_state("load")
+        clock.tick(5000)
+    expect(page.locator(".modal")).to_be_visible(timeout=10000)
+    page.locator(".modal-footer p").click()
+    expect(page.locator(".modal")).to_be_hidden()
+
+
+SCENARIOS = {"dynamic_loading": dynamic_loading, "entry_ad": entry_ad}
+
+
+def measure(browser, base_url, scenario, fake, repeat):
+    timings = []
+    for _ in range(repeat):
+        context = browser.new_context()
+        page = context.new_page()
+        clock = FakeClock(page).install() if fake else None
+        started = time.perf_counter()
+        scenario(page, base_url, clock)
+        timings.append(time.perf_counter() - started)
+        context.close()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with serve_directory() as base_url, sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        print(f"{'scenario':<18}{'real (s)':>10}{'fake (s)':>10}{'speedup':>10}")
+        for name, scenario in SCENARIOS.items():
+            real = statistics.median(measure(browser, base_url, scenario, False, args.repeat))
+            fake = statistics.median(measure(browser, base_url, scenario, True, args.repeat))
+            print(f"{name:<18}{real:>10.3f}{fake:>10.3f}{real / fake:>9.1f}x")
+        browser.close()
+
+
+if __name__ == "__main__":
+    main()
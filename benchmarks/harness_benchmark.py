@@ -0,0 +1,214 @@
+"""Benchmark the test harness itself against the local stand-in pages.
+
+Measures the costs that every test pays: launching a browser, creating a
+context and a page (the ``setup_page`` path, including the browser
+scheduler's slot and memory checks), navigating, locator actions
+and ``expect`` round-trips, dialog handling and teardown.  Results are
+written as JSON with summary statistics and compared against a stored
+baseline.
+
+Usage::
+
+    python -m benchmarks.harness_benchmark                   # run and compare
+    python -m benchmarks.harness_benchmark --save-baseline   # record a new baseline
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from playwright.sync_api import expect, sync_playwright
+
+from utils.resources import BrowserScheduler, ContextSlots
+from utils.server import serve_directory
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+# Environment fields that must match for timings to be comparable; the full
+# platform string (kernel version) and Python patch level are informational.
+COMPARED_ENVIRONMENT = ("browser", "headless", "system", "machine")
+
+
+def summarize(samples):
+    """Statistical summary of timings in milliseconds."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))
+    return {
+        "runs": len(ordered),
+        "min_ms": ordered[0],
+        "median_ms": statistics.median(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "stdev_ms": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "p95_ms": ordered[p95_index],
+        "max_ms": ordered[-1],
+    }
+
+
+class Timer:
+    """Collect named timings across benchmark iterations."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def measure(self, name, action, *args, **kwargs):
+        started = time.perf_counter()
+        result = action(*args, **kwargs)
+        self.samples.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+        return result
+
+    def summary(self):
+        return {name: summarize(samples) for name, samples in self.samples.items()}
+
+
+def run_lifecycle(timer, browser_type, launch_args):
+    browser = timer.measure("browser_launch", browser_type.launch, **launch_args)
+    context = timer.measure("context_create", browser.new_context)
+    page = timer.measure("page_create", context.new_page)
+    timer.measure("page_close", page.close)
+    timer.measure("context_close", context.close)
+    # The setup_page fixture path: the scheduler's memory check and context slot,
+    # a fresh page on the shared browser, then the slot release and RSS sample.
+    # Private slots keep a running suite from delaying the benchmark; recycling
+    # is off so the browser outlives the measurement.
+    with tempfile.TemporaryDirectory() as slots_directory:
+        scheduler = BrowserScheduler(lambda: browser, max_tests_per_browser=0, max_growth_mb=0,
+                                     slots=ContextSlots(slots_directory))
+        scheduler.acquire()  # first use records the browser's baseline RSS
+        scheduler.release()
+        page = timer.measure("setup_page", lambda: scheduler.acquire().new_page())
+
+        def teardown():
+            page.close()
+            scheduler.release()
+
+        timer.measure("setup_page_teardown", teardown)
+    timer.measure("browser_close", browser.close)
+
+
+def run_actions(timer, browser, base_url):
+    page = browser.new_page()
+    timer.measure("goto", page.goto, base_url + "login.html")
+
+    username = page.locator("#username")
+    timer.measure("locator_fill", username.fill, "tomsmith")
+    timer.measure("expect_to_have_value", expect(username).to_have_value, "tomsmith")
+    timer.measure("locator_click", page.locator('button[type="submit"]').click)
+    timer.measure("expect_to_be_visible", expect(page.locator(".flash.success")).to_be_visible)
+
+    page.goto(base_url + "javascript_alerts.html")
+
+    def accept_alert():
+        page.once("dialog", lambda dialog: dialog.accept())
+        page.locator("button[onclick='jsAlert()']").click()
+        expect(page.locator("#result")).to_have_text("You successfully clicked an alert")
+
+    timer.measure("dialog_accept", accept_alert)
+    page.close()
+
+
+def environment_mismatch(results, baseline):
+    """Environment fields that differ between the results and the baseline."""
+    current, previous = results["environment"], baseline.get("environment", {})
+    return {
+        key: (previous.get(key), current.get(key))
+        for key in COMPARED_ENVIRONMENT
+        if previous.get(key) != current.get(key)
+    }
+
+
+def compare(results, baseline, threshold):
+    """Rows of (name, baseline median, current median, change, regressed)."""
+    rows = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            continue
+        change = (current["median_ms"] - previous["median_ms"]) / previous["median_ms"]
+        rows.append((name, previous["median_ms"], current["median_ms"], change, change > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--lifecycle-iterations", type=int, default=5,
+                        help="browser launches are slow, so they get fewer iterations")
+    parser.add_argument("--browser", default="chromium", choices=("chromium", "firefox", "webkit"))
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="median slowdown that counts as a regression (default: 0.10 = 10%%)")
+    parser.add_argument("--ignore-environment", action="store_true",
+                        help="compare against a baseline recorded with a different browser, mode or platform")
+    args = parser.parse_args(argv)
+
+    timer = Timer()
+    launch_args = {"headless": not args.headed}
+    with serve_directory() as base_url, sync_playwright() as playwright:
+        browser_type = getattr(playwright, args.browser)
+        browser = browser_type.launch(**launch_args)
+        run_actions(timer, browser, base_url)  # warm-up, not recorded
+        timer.samples.clear()
+        for _ in range(args.lifecycle_iterations):
+            run_lifecycle(timer, browser_type, launch_args)
+        for _ in range(args.iterations):
+            run_actions(timer, browser, base_url)
+        browser.close()
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "system": platform.system(),
+            "machine": platform.machine(),
+            "browser": args.browser,
+            "headless": not args.headed,
+        },
+        "benchmarks": timer.summary(),
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'benchmark':<24}{'median ms':>12}{'p95 ms':>12}{'stdev':>10}")
+    for name, stats in results["benchmarks"].items():
+        print(f"{name:<24}{stats['median_ms']:>12.2f}{stats['p95_ms']:>12.2f}{stats['stdev_ms']:>10.2f}")
+    print(f"\nResults written to {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatch = environment_mismatch(results, baseline)
+        if mismatch:
+            details = ", ".join(f"{key}: {before!r} -> {after!r}" for key, (before, after) in mismatch.items())
+            if not args.ignore_environment:
+                # Timings from another browser, mode or platform would show false regressions
+                print(f"\nBaseline was recorded in a different environment ({details}); not comparing. "
+                      "Record a new baseline with --save-baseline or pass --ignore-environment.")
+                return 2
+            print(f"\nWarning: baseline environment differs ({details})")
+        print(f"\nCompared with baseline from {baseline.get('created', 'unknown date')}:")
+        for name, before, after, change, regressed in compare(results, baseline, args.threshold):
+            marker = "  REGRESSION" if regressed else ""
+            print(f"{name:<24}{before:>10.2f} -> {after:>10.2f} ms ({change:+.1%}){marker}")
+            if regressed:
+                regressions.append(name)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,252 @@
+import itertools
+import os
 import pytest
+import shutil
+import tempfile
+
+from utils.a11y import SnapshotStore, format_diff
+from utils.checkpoints import store as checkpoint_store
+from utils.clock import FakeClock
+from utils.crawler import Crawler
+from utils.events import EventRegistry
+from utils.files import DOWNLOAD_HEADROOM, FileTransfer, tmpfs_root
+from utils.frames import FrameResolver
+from utils.locators import profiler as selector_profiler
+from utils.mocking import MockRouter
+from utils.performance import install_collector, report as performance_report
+from utils.reporting import FSYNC_MODES, ResultStreamPlugin
+from utils.resources import BrowserScheduler
+from utils.server import serve_directory
+from utils.sharding import DEFAULT_DURATIONS, DEFAULT_RESULTS_DIR, ShardPlugin, parse_shard
 
 @pytest.fixture(scope="session")
-def setup_playwright():
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as p:
-        yield p
+def setup_playwright(playwright):
+    # Share pytest-playwright's driver so a warm one (e.g. from utils.daemon) is reused
+    return playwright
+
+browser_scheduler_key = pytest.StashKey[BrowserScheduler]()
+
+@pytest.fixture(scope="session")
+def browser_scheduler(pytestconfig, launch_browser):
+    scheduler = BrowserScheduler(
+        launch_browser,
+        max_tests_per_browser=pytestconfig.getoption("--max-tests-per-browser"),
+        max_growth_mb=pytestconfig.getoption("--max-browser-growth-mb"),
+        min_free_mb=pytestconfig.getoption("--min-free-memory-mb"),
+        context_mb=pytestconfig.getoption("--context-memory-mb"),
+        max_contexts=pytestconfig.getoption("--max-contexts-per-host"),
+    )
+    pytestconfig.stash[browser_scheduler_key] = scheduler
+    return scheduler
+
+@pytest.fixture
+def browser(browser_scheduler):
+    # Waits for memory and a host-wide context slot, recycling worn-out browsers
+    yield browser_scheduler.acquire()
+    browser_scheduler.release()
 
 @pytest.fixture(autouse=True)
-def setup_page(setup_playwright):
-    # This fixture will run before each test
-    browser = setup_playwright.chromium.launch()
-    page = browser.new_page()
+def setup_page(request):
+    # This fixture will run before each test; no_browser tests skip the browser entirely
+    if request.node.get_closest_marker("no_browser"):
+        yield None
+        return
+    page = request.getfixturevalue("browser").new_page()
     yield page
     page.close()
-    browser.close()
\ No newline at end of file
+
+@pytest.fixture
+def context(context):
+    # Register the performance collector once per context; every page and
+    # navigation in the context picks it up from the init script.
+    install_collector(context)
+    yield context
+
+def pytest_addoption(parser):
+    group = parser.getgroup("results", "structured result streaming")
+    group.addoption("--results-jsonl", default=None,
+                    help="stream test events as JSON lines to a file, tcp:HOST:PORT or unix:PATH")
+    group.addoption("--results-junit", default=None, help="write JUnit XML for the run to this path")
+    group.addoption("--results-fsync", default="none", choices=FSYNC_MODES,
+                    help="fsync the JSON lines file after every batch ('batch') or only at the end")
+
+    parser.addoption("--profile-selectors", action="store_true", default=False,
+                     help="rank selectors by in-page resolution cost in the terminal summary")
+    parser.addoption("--update-a11y-snapshots", action="store_true", default=False,
+                     help="record missing accessibility snapshots and rewrite ones that no longer match")
+
+    group = parser.getgroup("sharding", "splitting the suite across agents")
+    group.addoption("--shard", type=parse_shard, default=None, metavar="i/N",
+                    help="run the i-th of N duration-balanced shards and write its result bundle")
+    group.addoption("--shard-durations", default=DEFAULT_DURATIONS,
+                    help="duration history used to balance shards, relative to the rootdir")
+    group.addoption("--shard-dir", default=DEFAULT_RESULTS_DIR, help="directory for shard result bundles")
+
+    group = parser.getgroup("resources", "browser memory scheduling")
+    group.addoption("--max-tests-per-browser", type=int, default=100,
+                    help="recycle the browser after this many tests (0 disables)")
+    group.addoption("--max-browser-growth-mb", type=int, default=512,
+                    help="recycle the browser once its processes grew by this much (0 disables)")
+    group.addoption("--min-free-memory-mb", type=int, default=1024,
+                    help="delay test starts while less memory than this is available and other tests hold slots")
+    group.addoption("--context-memory-mb", type=int, default=250,
+                    help="estimated memory per browser context; total memory / this caps concurrent contexts")
+    group.addoption("--max-contexts-per-host", type=int, default=0,
+                    help="hard cap on concurrent contexts across all workers (0: CPU count)")
+
+def pytest_configure(config):
+    if config.getoption("--profile-selectors"):
+        selector_profiler.install()
+    shard = config.getoption("--shard")
+    if shard:
+        durations = os.path.join(str(config.rootpath), config.getoption("--shard-durations"))
+        plugin = ShardPlugin(*shard, durations, config.getoption("--shard-dir"),
+                             write_bundle=not hasattr(config, "workerinput"))
+        config.pluginmanager.register(plugin, "shard")
+    # Under xdist only the controller streams; it receives every worker's reports
+    if hasattr(config, "workerinput"):
+        return
+    target = config.getoption("--results-jsonl")
+    junit_path = config.getoption("--results-junit")
+    if target or junit_path:
+        plugin = ResultStreamPlugin(target, junit_path, config.getoption("--results-fsync"))
+        config.pluginmanager.register(plugin, "result-stream")
+
+def pytest_sessionstart(session):
+    # Long-lived processes (utils.daemon) run many sessions; start each one clean
+    performance_report.entries.clear()
+    checkpoint_store.clear()
+    selector_profiler.clear()
+
+def pytest_unconfigure(config):
+    selector_profiler.uninstall()
+
+@pytest.fixture(autouse=True)
+def performance_budget_test(request):
+    performance_report.current_test = request.node.nodeid
+    yield
+    performance_report.current_test = None
+
+@pytest.fixture(autouse=True)
+def selector_profile_test(request):
+    selector_profiler.current_test = request.node.nodeid
+    yield
+    selector_profiler.current_test = None
+
+@pytest.fixture(autouse=True)
+def playwright_artifacts(request, output_path):
+    # Report pytest-playwright's screenshots, traces and videos with the test's
+    # results; they are written while the context fixture tears down, before this.
+    yield
+    for directory, _, files in os.walk(output_path):
+        for name in sorted(files):
+            request.node.user_properties.append(("artifact", os.path.join(directory, name)))
+
+@pytest.fixture
+def mock_routes(page):
+    # Declarative route mocks for the test's page; unmatched requests go to the network
+    router = MockRouter()
+    router.attach(page)
+    yield router
+    router.detach()
+
+@pytest.fixture
+def events(page):
+    # Scoped page listeners; fails the test if other listeners are left behind
+    registry = EventRegistry(page)
+    yield registry
+    leaked = registry.close()
+    if leaked:
+        pytest.fail(f"Event listeners left on the page: {leaked}; register them through the events fixture")
+
+@pytest.fixture(scope="session")
+def transfer_staging_root():
+    # Shared directory for staged uploads and browser downloads; downloads_path is
+    # fixed at launch, so tmpfs is only used when it has room for a large download
+    root = tempfile.mkdtemp(prefix="playwright-transfer-", dir=tmpfs_root(required=DOWNLOAD_HEADROOM))
+    yield root
+    shutil.rmtree(root, ignore_errors=True)
+
+@pytest.fixture(scope="session")
+def browser_type_launch_args(browser_type_launch_args, transfer_staging_root):
+    return {**browser_type_launch_args, "downloads_path": transfer_staging_root}
+
+@pytest.fixture
+def file_transfer(transfer_staging_root):
+    transfer = FileTransfer(root=transfer_staging_root)
+    yield transfer
+    transfer.cleanup()
+
+@pytest.fixture
+def frames(page):
+    # Frame handles resolved once per navigation instead of per action
+    resolver = FrameResolver(page)
+    yield resolver
+    resolver.close()
+
+@pytest.fixture(scope="session")
+def local_site():
+    # Offline stand-in pages for the-internet, served from tests/site
+    with serve_directory() as base_url:
+        yield base_url
+
+@pytest.fixture
+def crawl(browser_name, browser_type_launch_args):
+    def run(seed, **options):
+        options.setdefault("browser_name", browser_name)
+        options.setdefault("launch_args", browser_type_launch_args)
+        return Crawler(seed, **options).run()
+    return run
+
+@pytest.fixture
+def checkpoint(page):
+    # checkpoint(name, setup, probe) brings the page to a recorded state
+    def reach(name, setup, probe=None):
+        return checkpoint_store.reach(page, name, setup, probe)
+    return reach
+
+@pytest.fixture
+def fake_clock(page):
+    # fake_clock.tick(ms) fires the page's timers without waiting in real time
+    return FakeClock(page).install()
+
+@pytest.fixture(scope="session")
+def a11y_snapshots(pytestconfig):
+    # Snapshot files are read on first use and written once at the end of the run
+    store = SnapshotStore(update=pytestconfig.getoption("--update-a11y-snapshots"))
+    yield store
+    store.save()
+
+@pytest.fixture
+def assert_a11y_snapshot(request, page, a11y_snapshots):
+    counter = itertools.count()
+    def check(name=None, locator=None, masks=()):
+        name = name or f"{request.node.name}[{next(counter)}]"
+        changes = a11y_snapshots.check(str(request.path), name, locator or page.locator("body"), masks)
+        if changes and changes[0][0] == "missing":
+            pytest.fail(f"No accessibility snapshot {name!r} recorded ({changes[0][2]}); "
+                        "run with --update-a11y-snapshots to record it and commit the file")
+        if changes:
+            pytest.fail(f"Accessibility tree differs from snapshot {name!r}:\n{format_diff(changes)}\n"
+                        "Run with --update-a11y-snapshots to accept the changes")
+    return check
+
+def pytest_terminal_summary(terminalreporter):
+    lines = performance_report.summary_lines()
+    if lines:
+        terminalreporter.write_sep("=", "performance budgets")
+        for line in lines:
+            terminalreporter.write_line(line)
+    scheduler = terminalreporter.config.stash.get(browser_scheduler_key, None)
+    if scheduler is not None:
+        terminalreporter.write_sep("=", "resources")
+        terminalreporter.write_line(scheduler.summary())
+    if checkpoint_store.checkpoints:
+        terminalreporter.write_sep("=", "checkpoints")
+        for line in checkpoint_store.summary().splitlines():
+            terminalreporter.write_line(line)
+    lines = selector_profiler.summary_lines()
+    if lines:
+        terminalreporter.write_sep("=", "selector profile")
+        for line in lines:
+            terminalreporter.write_line(line)
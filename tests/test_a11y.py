@@ -0,0 +1,159 @@
+import json
+
+import pytest
+
+from utils.a11y import Node, SnapshotFile, SnapshotStore, diff_trees, format_diff, parse_aria_snapshot
+
+pytestmark = pytest.mark.no_browser
+
+LOGIN = """
+- heading "Login Page" [level=2]
+- text: Username
+- textbox "Username"
+- text: Password
+- textbox "Password"
+- button "Login"
+- link "Home":
+  - /url: index.html
+"""
+
+NAVIGATION = r'''
+- navigation "Main":
+  - list:
+    - listitem:
+      - link "Home":
+        - /url: /
+    - listitem:
+      - link "Cart (3 items)":
+        - /url: /cart
+- heading "Say \"hi\"" [level=1]
+- paragraph: "Order: #1234"
+- checkbox "Remember me" [checked]
+'''
+
+
+class FakeLocator:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def aria_snapshot(self):
+        return self.snapshot
+
+
+def labels(node):
+    return [node.label, [labels(child) for child in node.children]]
+
+
+def test_parse_flat_snapshot():
+    """Test roles, names, attributes, inline text and properties are parsed"""
+    tree = parse_aria_snapshot(LOGIN)
+
+    assert [child.label for child in tree.children] == [
+        'heading "Login Page" [level=2]',
+        "text: Username",
+        'textbox "Username"',
+        "text: Password",
+        'textbox "Password"',
+        'button "Login"',
+        'link "Home" [url=index.html]',
+    ]
+
+
+def test_parse_nested_snapshot():
+    """Test indentation builds the tree and quoted names and values are unescaped"""
+    tree = parse_aria_snapshot(NAVIGATION)
+
+    navigation, heading, paragraph, checkbox = tree.children
+    assert labels(navigation) == ['navigation "Main"', [["list", [
+        ["listitem", [['link "Home" [url=/]', []]]],
+        ["listitem", [['link "Cart (3 items)" [url=/cart]', []]]],
+    ]]]]
+    assert (heading.role, heading.name, heading.attrs) == ("heading", 'Say "hi"', "[level=1]")
+    assert (paragraph.role, paragraph.text) == ("paragraph", "Order: #1234")
+    assert checkbox.attrs == "[checked]"
+
+
+def test_parse_masks_dynamic_text():
+    """Test masks replace dynamic parts of names and text"""
+    tree = parse_aria_snapshot(NAVIGATION, masks=[r"\d+"])
+
+    cart = tree.children[0].children[0].children[1].children[0]
+    assert cart.name == "Cart (* items)"
+    assert tree.children[2].text == "Order: #*"
+
+
+def test_compact_round_trip():
+    """Test the stored form rebuilds an identical tree"""
+    tree = parse_aria_snapshot(NAVIGATION)
+    restored = Node.from_compact(json.loads(json.dumps(tree.to_compact())))
+
+    assert restored.digest == tree.digest
+    assert diff_trees(tree, restored) == []
+
+
+def test_diff_identical_trees():
+    """Test equal trees produce no changes"""
+    assert diff_trees(parse_aria_snapshot(LOGIN), parse_aria_snapshot(LOGIN)) == []
+
+
+def test_diff_added_removed_changed():
+    """Test added, removed and changed nodes are reported with their path"""
+    old = parse_aria_snapshot(LOGIN)
+    new = parse_aria_snapshot(
+        LOGIN.replace('- button "Login"', '- checkbox "Remember me"\n- button "Login"')
+             .replace("- text: Password\n", "")
+             .replace("[level=2]", "[level=1]")
+    )
+
+    assert diff_trees(old, new) == [
+        ("changed", "root", 'heading "Login Page" [level=2] -> heading "Login Page" [level=1]'),
+        ("removed", "root", "text: Password"),
+        ("added", "root", 'checkbox "Remember me"'),
+    ]
+
+
+def test_diff_nested_change():
+    """Test a change deep in the tree is reported under its ancestors only"""
+    old = parse_aria_snapshot(NAVIGATION)
+    new = parse_aria_snapshot(NAVIGATION.replace("/url: /cart", "/url: /basket"))
+
+    changes = diff_trees(old, new)
+
+    assert changes == [(
+        "changed",
+        'root/navigation "Main"/list/listitem',
+        'link "Cart (3 items)" [url=/cart] -> link "Cart (3 items)" [url=/basket]',
+    )]
+    assert format_diff(changes).startswith('~ root/navigation "Main"/list/listitem: ')
+
+
+def test_store_missing_update_and_compare(tmp_path):
+    """Test a missing snapshot is reported, recorded in update mode and compared after"""
+    module = str(tmp_path / "test_login.py")
+
+    assert SnapshotStore().check(module, "login", FakeLocator(LOGIN))[0][0] == "missing"
+
+    recorder = SnapshotStore(update=True)
+    assert recorder.check(module, "login", FakeLocator(LOGIN)) == []
+    recorder.save()
+    assert (tmp_path / "__snapshots__" / "test_login.a11y.json").exists()
+
+    store = SnapshotStore()
+    assert store.check(module, "login", FakeLocator(LOGIN)) == []
+    changes = store.check(module, "login", FakeLocator(LOGIN.replace('"Login"', '"Sign in"')))
+    assert changes == [("changed", "root", 'button "Login" -> button "Sign in"')]
+
+
+def test_snapshot_files_merge_on_save(tmp_path):
+    """Test two writers of one file keep each other's snapshots"""
+    path = str(tmp_path / "test_module.a11y.json")
+    first, second = SnapshotFile(path), SnapshotFile(path)
+    assert first.get("a") is None and second.get("b") is None
+
+    first.put("a", parse_aria_snapshot(LOGIN))
+    second.put("b", parse_aria_snapshot(NAVIGATION))
+    first.save()
+    second.save()
+
+    with open(path) as f:
+        assert sorted(json.load(f)) == ["a", "b"]
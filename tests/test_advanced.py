@@ -2,8 +2,10 @@ import pytest
 from playwright.sync_api import Page, expect
 import re
 
+from utils.locators import SelectorProfiler
+
 @pytest.mark.regression
-def test_dynamic_content_loading(page: Page):
+def test_dynamic_content_loading(page: Page, fake_clock):
     """Test dynamic content loading"""
     page.goto("https://the-internet.herokuapp.com/dynamic_loading/2")
     
@@ -13,53 +15,75 @@ def test_dynamic_content_loading(page: Page):
     # Wait for loading indicator
     expect(page.locator("#loading")).to_be_visible()
     
-    # Wait for content to appear
-    page.wait_for_selector("#finish", state="visible", timeout=10000)
+    # Fast-forward the loading delay instead of waiting for it
+    fake_clock.tick(5000)
+    page.wait_for_selector("#finish", state="visible")
     
     # Verify content loaded
     expect(page.locator("#finish h4")).to_have_text("Hello World!")
 
 
 @pytest.mark.regression
-def test_javascript_alerts(page: Page):
+def test_javascript_alerts(page: Page, events):
     """Test handling JavaScript alerts"""
     page.goto("https://the-internet.herokuapp.com/javascript_alerts")
     
     # Test JS Alert
-    page.on("dialog", lambda dialog: dialog.accept())
+    events.accept_next_dialog()
     page.locator("button[onclick='jsAlert()']").click()
     
     # Verify result
     expect(page.locator("#result")).to_have_text("You successfully clicked an alert")
 
 
-def test_javascript_confirm(page: Page):
+def test_javascript_confirm(page: Page, events):
     """Test handling JavaScript confirm dialogs"""
     page.goto("https://the-internet.herokuapp.com/javascript_alerts")
     
     # Test JS Confirm - Accept
-    page.on("dialog", lambda dialog: dialog.accept())
+    events.accept_next_dialog()
     page.locator("button[onclick='jsConfirm()']").click()
     expect(page.locator("#result")).to_have_text("You clicked: Ok")
     
     # Test JS Confirm - Dismiss
-    page.on("dialog", lambda dialog: dialog.dismiss())
+    events.dismiss_next_dialog()
     page.locator("button[onclick='jsConfirm()']").click()
     expect(page.locator("#result")).to_have_text("You clicked: Cancel")
+    
+    # Each dialog ran exactly one handler
+    assert events.stats()["dialog"] == {"emitted": 2, "handler_calls": 2}
 
 
-def test_javascript_prompt(page: Page):
+def test_javascript_prompt(page: Page, events):
     """Test handling JavaScript prompts"""
     page.goto("https://the-internet.herokuapp.com/javascript_alerts")
     
     # Handle prompt with text input
-    page.on("dialog", lambda dialog: dialog.accept("Test Input"))
+    events.accept_next_dialog("Test Input")
     page.locator("button[onclick='jsPrompt()']").click()
     
     # Verify result
     expect(page.locator("#result")).to_have_text("You entered: Test Input")
 
 
+def test_scoped_event_handlers(page: Page, events, local_site):
+    """Test handlers are removed when their scope exits"""
+    page.goto(local_site + "javascript_alerts.html")
+    messages = []
+    
+    with events.scope():
+        events.on("console", lambda msg: messages.append(msg.text))
+        page.evaluate("console.log('inside scope')")
+    page.evaluate("console.log('outside scope')")
+    
+    assert messages == ["inside scope"]
+    assert events.leaked_listeners() == {}
+    
+    # Without a handler the alert is dismissed by default
+    page.locator("button[onclick='jsAlert()']").click()
+    assert "dialog" not in events.stats()
+
+
 @pytest.mark.smoke
 def test_drag_and_drop(page: Page):
     """Test drag and drop functionality"""
@@ -100,12 +124,12 @@ def test_infinite_scroll(page: Page):
     assert new_count > initial_count
 
 
-def test_context_menu(page: Page):
+def test_context_menu(page: Page, events):
     """Test right-click context menu"""
     page.goto("https://the-internet.herokuapp.com/context_menu")
     
     # Handle alert
-    page.on("dialog", lambda dialog: dialog.accept())
+    events.accept_next_dialog()
     
     # Right-click on hot spot
     page.locator("#hot-spot").click(button="right")
@@ -146,26 +170,28 @@ def test_multiple_windows(page: Page):
 
 
 @pytest.mark.smoke
-def test_nested_frames(page: Page):
+def test_nested_frames(page: Page, frames):
     """Test working with nested iframes"""
     page.goto("https://the-internet.herokuapp.com/nested_frames")
     
-    # Access top frame
-    top_frame = page.frame_locator('frame[name="frame-top"]')
-    
-    # Access left frame within top frame
-    left_frame = top_frame.frame_locator('frame[name="frame-left"]')
+    # Resolve left frame within top frame
+    left_frame = frames.frame('frame[name="frame-top"]', 'frame[name="frame-left"]')
     
     # Verify content in nested frame
     expect(left_frame.locator("body")).to_contain_text("LEFT")
+    
+    # Sibling frame reuses the cached top frame
+    middle_frame = frames.frame('frame[name="frame-top"]', 'frame[name="frame-middle"]')
+    expect(middle_frame.locator("body")).to_contain_text("MIDDLE")
+    assert frames.stats()["hits"] == 1
 
 
-def test_iframe_content(page: Page):
+def test_iframe_content(page: Page, frames):
     """Test interacting with iframe content"""
     page.goto("https://the-internet.herokuapp.com/iframe")
     
     # Access iframe
-    iframe = page.frame_locator("#mce_0_ifr")
+    iframe = frames.frame("#mce_0_ifr")
     
     # Clear and type in iframe
     iframe.locator("body").clear()
@@ -175,6 +201,19 @@ def test_iframe_content(page: Page):
     expect(iframe.locator("body")).to_contain_text("Hello from Playwright!")
 
 
+def test_frame_cache_invalidated_on_navigation(page: Page, frames):
+    """Test cached frames are dropped when the page navigates"""
+    page.goto("https://the-internet.herokuapp.com/nested_frames")
+    frames.frame('frame[name="frame-bottom"]')
+    assert frames.stats()["cached"] == 1
+    
+    page.reload()
+    assert frames.stats()["cached"] == 0
+    
+    # Resolves again against the new document
+    expect(frames.frame('frame[name="frame-bottom"]').locator("body")).to_contain_text("BOTTOM")
+
+
 @pytest.mark.regression
 def test_shadow_dom(page: Page):
     """Test interacting with Shadow DOM elements"""
@@ -189,7 +228,7 @@ def test_shadow_dom(page: Page):
 
 
 @pytest.mark.regression
-def test_file_download(page: Page):
+def test_file_download(page: Page, file_transfer):
     """Test file download functionality"""
     page.goto("https://the-internet.herokuapp.com/download")
     
@@ -200,8 +239,12 @@ def test_file_download(page: Page):
     
     download = download_info.value
     
+    # Hash the download where the browser saved it
+    received = file_transfer.receive(download)
+    
     # Verify download
     assert download.suggested_filename == "sample.txt"
+    assert received.size > 0
 
 
 def test_key_presses(page: Page):
@@ -233,12 +276,12 @@ def test_geolocation(page: Page):
     page.goto("https://example.com")
 
 
-def test_network_interception(page: Page):
+def test_network_interception(page: Page, events):
     """Test network request interception"""
     requests = []
     
     # Intercept requests
-    page.on("request", lambda request: requests.append(request.url))
+    events.on("request", lambda request: requests.append(request.url))
     
     page.goto("https://example.com")
     
@@ -247,13 +290,64 @@ def test_network_interception(page: Page):
     assert any("example.com" in url for url in requests)
 
 
+def test_mocked_api_response(page: Page, mock_routes):
+    """Test serving canned, file-backed and handler-generated responses"""
+    mock_routes.add("https://example.com/", body="<h1>Mocked Home</h1><p id='status'></p>")
+    mock_routes.add("**/api/status", json={"status": "ok"})
+    mock_routes.add(
+        "**/api/echo/*",
+        handler=lambda request: {"status": 200, "body": request.url.rsplit("/", 1)[-1]},
+    )
+    
+    page.goto("https://example.com/")
+    expect(page.locator("h1")).to_have_text("Mocked Home")
+    
+    # Fetch the mocked APIs from the page
+    status = page.evaluate("fetch('/api/status').then(r => r.json())")
+    echo = page.evaluate("fetch('/api/echo/hello').then(r => r.text())")
+    assert status == {"status": "ok"}
+    assert echo == "hello"
+    
+    # Verify per-route counters
+    stats = mock_routes.stats()
+    assert stats["**/api/status"]["hits"] == 1
+    assert stats["**/api/echo/*"]["hits"] == 1
+
+
+def test_mocked_regex_routes(page: Page, mock_routes):
+    """Test regex routes with clashing group names and inline flags"""
+    mock_routes.add(re.compile(r"/api/users/(?P<id>\d+)$"), json={"kind": "user"})
+    mock_routes.add(re.compile(r"/api/items/(?P<id>\d+)$"), json={"kind": "item"})
+    mock_routes.add(re.compile(r"(?i)/API/STATUS$"), json={"status": "ok"})
+    mock_routes.add("https://example.com/", body="<h1>Mocked Home</h1>")
+    
+    page.goto("https://example.com/")
+    assert page.evaluate("fetch('/api/items/7').then(r => r.json())") == {"kind": "item"}
+    assert page.evaluate("fetch('/api/status').then(r => r.json())") == {"status": "ok"}
+
+
+def test_mocked_static_response_etag(page: Page, mock_routes):
+    """Test conditional requests to a static mock get a 304"""
+    route = mock_routes.add("https://example.com/", body="<h1>Cached</h1>")
+    page.goto("https://example.com/")
+    
+    etag = page.evaluate("fetch('/').then(r => r.headers.get('etag'))")
+    status = page.evaluate(
+        "etag => fetch('/', {headers: {'If-None-Match': etag}, cache: 'no-store'}).then(r => r.status)",
+        etag,
+    )
+    
+    assert status == 304
+    assert route.not_modified == 1
+
+
 @pytest.mark.regression
-def test_console_messages(page: Page):
+def test_console_messages(page: Page, events):
     """Test capturing console messages"""
     console_messages = []
     
     # Listen for console messages
-    page.on("console", lambda msg: console_messages.append(msg.text))
+    events.on("console", lambda msg: console_messages.append(msg.text))
     
     page.goto("https://the-internet.herokuapp.com/")
     
@@ -270,11 +364,13 @@ def test_authentication(page: Page):
 
 
 @pytest.mark.regression
-def test_entry_ad_modal(page: Page):
+def test_entry_ad_modal(page: Page, fake_clock):
     """Test handling entry ad modal"""
     page.goto("https://the-internet.herokuapp.com/entry_ad")
     
-    # Wait for modal to appear
+    # Let the page schedule its modal timer, then fast-forward the delay
+    page.wait_for_load_state("networkidle")
+    fake_clock.tick(5000)
     modal = page.locator(".modal")
     expect(modal).to_be_visible()
     
@@ -285,6 +381,46 @@ def test_entry_ad_modal(page: Page):
     expect(modal).to_be_hidden()
 
 
+def test_fake_clock_local_timers(page: Page, fake_clock, local_site):
+    """Test fast-forwarding timers on the local stand-in page"""
+    page.goto(local_site + "dynamic_loading.html")
+    # Paused, real time spent between calls can't push the timer over its deadline
+    fake_clock.pause()
+    page.locator("#start button").click()
+    
+    # Nothing happens until time is advanced
+    fake_clock.tick(4999)
+    expect(page.locator("#finish")).to_have_count(0)
+    
+    fake_clock.tick(1)
+    expect(page.locator("#finish h4")).to_have_text("Hello World!")
+
+
+def test_selector_profiler_local_site(page: Page, local_site):
+    """Test selector profiler counts uses and times resolution in-page"""
+    profiler = SelectorProfiler()
+    profiler.install()
+    try:
+        page.goto(local_site + "login.html")
+        page.locator("#username").fill("tomsmith")
+        page.locator("#password").fill("SuperSecretPassword!")
+        expect(page.locator("#username")).to_have_value("tomsmith")
+        page.get_by_role("button").click()
+    finally:
+        profiler.uninstall()
+    
+    username = profiler.stats["#username"]
+    assert username.uses == 2
+    assert username.actions == {"fill": 1, "expect": 1}
+    assert username.method == "dom"
+    assert username.matches == 1
+    
+    # Role selectors are not CSS and are timed by round-trip
+    button = next(s for s in profiler.stats.values() if s.selector.startswith("internal:role"))
+    assert button.method == "round-trip"
+    assert profiler.ranked()[0].total_ms >= profiler.ranked()[-1].total_ms
+
+
 def test_slow_resources(page: Page):
     """Test handling slow-loading resources"""
     page.goto("https://the-internet.herokuapp.com/slow")
@@ -0,0 +1,99 @@
+import json
+import os
+import socket
+import sys
+
+import pytest
+
+from utils.daemon import ModuleReloader, handle
+
+pytestmark = pytest.mark.no_browser
+
+
+def run_request(raw, reloader, run):
+    """Send one raw request line through handle() and return (keep serving, events)."""
+    server, client = socket.socketpair()
+    with client:
+        client.sendall(raw)
+        client.shutdown(socket.SHUT_WR)
+        keep_serving = handle(server, reloader, run)
+        events = [json.loads(line) for line in client.makefile("rb")]
+    return keep_serving, events
+
+
+def test_daemon_runs_request(tmp_path):
+    """Test a run request streams the reload and finish events"""
+    calls = []
+    def run(args, client):
+        calls.append(args)
+        client.send({"event": "start", "nodeid": args[0]})
+        return 1
+    
+    keep_serving, events = run_request(b'{"command": "run", "args": ["tests/x.py::t"]}\n',
+                                       ModuleReloader(str(tmp_path)), run)
+    
+    assert keep_serving
+    assert calls == [["tests/x.py::t"]]
+    assert [event["event"] for event in events] == ["start", "finished"]
+    assert events[-1]["exit_code"] == 1
+
+
+@pytest.mark.parametrize("raw", [b"not json\n", b"[1, 2]\n", b'{"args": "tests"}\n', b"\xff\n"])
+def test_daemon_rejects_malformed_request(tmp_path, raw):
+    """Test a malformed request gets an error event and the daemon keeps serving"""
+    def run(args, client):
+        raise AssertionError("must not run")
+    
+    keep_serving, events = run_request(raw, ModuleReloader(str(tmp_path)), run)
+    
+    assert keep_serving
+    assert events[0]["event"] == "error"
+
+
+def test_daemon_survives_client_disconnect(tmp_path):
+    """Test a client that goes away mid-run doesn't take the daemon down"""
+    server, client = socket.socketpair()
+    client.sendall(b'{"command": "run", "args": []}\n')
+    client.close()
+    
+    def run(args, client_conn):
+        for i in range(100):
+            client_conn.send({"event": "start", "nodeid": f"t{i}"})
+        return 0
+    
+    assert handle(server, ModuleReloader(str(tmp_path)), run)
+
+
+def test_daemon_stop_request(tmp_path):
+    """Test the stop command ends the serve loop"""
+    keep_serving, events = run_request(b'{"command": "stop"}\n', ModuleReloader(str(tmp_path)), None)
+    
+    assert not keep_serving
+    assert events == [{"event": "stopped"}]
+
+
+def test_reloader_drops_only_project_modules(tmp_path, monkeypatch):
+    """Test changed project modules are dropped while a venv in the project is not"""
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "daemon_probe.py").write_text("VALUE = 1\n")
+    venv = tmp_path / "venv" / "lib" / "site-packages"
+    venv.mkdir(parents=True)
+    (venv / "daemon_vendor.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(venv))
+    monkeypatch.syspath_prepend(str(tmp_path / "tests"))
+    
+    import daemon_probe  # noqa: F401
+    import daemon_vendor  # noqa: F401
+    reloader = ModuleReloader(str(tmp_path))
+    reloader.remember()
+    assert reloader.refresh() == []
+    
+    # Touch both files; only the project module is dropped
+    for path in (tmp_path / "tests" / "daemon_probe.py", venv / "daemon_vendor.py"):
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    
+    assert reloader.refresh() == ["daemon_probe"]
+    assert "daemon_probe" not in sys.modules
+    assert "daemon_vendor" in sys.modules
+    monkeypatch.delitem(sys.modules, "daemon_vendor")
@@ -1,6 +1,30 @@
 import pytest
 from playwright.sync_api import Page, expect
 
+
+def go_to_checkout_step_one(page: Page):
+    """Log in, add the first product and open checkout step one"""
+    page.goto("https://www.saucedemo.com/")
+    page.locator("#user-name").fill("standard_user")
+    page.locator("#password").fill("secret_sauce")
+    page.locator("#login-button").click()
+    page.locator(".inventory_item").first.locator("button").click()
+    page.locator(".shopping_cart_link").click()
+    page.locator("#checkout").click()
+    expect(page).to_have_url("https://www.saucedemo.com/checkout-step-one.html")
+
+
+def is_on_checkout_step_one(page: Page):
+    """Cheap probe that a restored checkout page is usable"""
+    return page.url.endswith("/checkout-step-one.html") and page.locator("#first-name").is_visible()
+
+
+@pytest.fixture
+def checkout_page(page: Page, checkpoint):
+    """Page logged in with one item in the cart, on checkout step one"""
+    return checkpoint("checkout_step_one", go_to_checkout_step_one, is_on_checkout_step_one)
+
+
 @pytest.mark.e2e
 def test_product_search(page: Page):
     """Test product search functionality"""
@@ -85,23 +109,9 @@ def test_view_cart(page: Page):
 
 @pytest.mark.e2e
 @pytest.mark.regression
-def test_complete_checkout_process(page: Page):
+def test_complete_checkout_process(checkout_page: Page):
     """Test complete checkout flow from cart to order confirmation"""
-    page.goto("https://www.saucedemo.com/")
-    
-    # Login
-    page.locator("#user-name").fill("standard_user")
-    page.locator("#password").fill("secret_sauce")
-    page.locator("#login-button").click()
-    
-    # Add product to cart
-    page.locator(".inventory_item").first.locator("button").click()
-    
-    # Go to cart
-    page.locator(".shopping_cart_link").click()
-    
-    # Proceed to checkout
-    page.locator("#checkout").click()
+    page = checkout_page
     
     # Fill checkout information
     page.locator("#first-name").fill("John")
@@ -209,19 +219,9 @@ def test_continue_shopping_from_cart(page: Page):
 
 
 @pytest.mark.e2e
-def test_checkout_validation(page: Page):
+def test_checkout_validation(checkout_page: Page):
     """Test checkout form validation"""
-    page.goto("https://www.saucedemo.com/")
-    
-    # Login
-    page.locator("#user-name").fill("standard_user")
-    page.locator("#password").fill("secret_sauce")
-    page.locator("#login-button").click()
-    
-    # Add product and go to checkout
-    page.locator(".inventory_item").first.locator("button").click()
-    page.locator(".shopping_cart_link").click()
-    page.locator("#checkout").click()
+    page = checkout_page
     
     # Try to continue without filling form
     page.locator("#continue").click()
@@ -253,19 +253,9 @@ def test_logout_clears_cart(page: Page):
 
 
 @pytest.mark.regression
-def test_price_calculation_in_cart(page: Page):
+def test_price_calculation_in_cart(checkout_page: Page):
     """Test that prices are calculated correctly in cart"""
-    page.goto("https://www.saucedemo.com/")
-    
-    # Login
-    page.locator("#user-name").fill("standard_user")
-    page.locator("#password").fill("secret_sauce")
-    page.locator("#login-button").click()
-    
-    # Add products and go through checkout
-    page.locator(".inventory_item").first.locator("button").click()
-    page.locator(".shopping_cart_link").click()
-    page.locator("#checkout").click()
+    page = checkout_page
     
     # Fill checkout info
     page.locator("#first-name").fill("John")
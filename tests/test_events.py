@@ -0,0 +1,93 @@
+import pytest
+from pyee import EventEmitter
+
+from utils.events import EventRegistry, missing_internals
+
+pytestmark = pytest.mark.no_browser
+
+
+class FakePage:
+    """The parts of a sync Page the registry uses, over a pyee emitter like Playwright's."""
+
+    def __init__(self, emitter=True):
+        if emitter:
+            self._impl_obj = EventEmitter()
+        self._listeners = []
+
+    def on(self, event, handler):
+        if hasattr(self, "_impl_obj"):
+            self._impl_obj.on(event, handler)
+        self._listeners.append((event, handler))
+
+    def remove_listener(self, event, handler):
+        if hasattr(self, "_impl_obj"):
+            self._impl_obj.remove_listener(event, handler)
+        self._listeners.remove((event, handler))
+
+    def emit(self, event, *args):
+        for name, handler in list(self._listeners):
+            if name == event:
+                handler(*args)
+
+    def is_closed(self):
+        return False
+
+
+def test_playwright_internals_present():
+    """Test the private Playwright names leak detection reads still exist"""
+    # Without them listener_counts() is empty and leaks go unreported
+    assert missing_internals() == []
+
+
+def test_scoped_handlers_are_removed():
+    """Test handlers registered in a scope stop firing when it exits"""
+    page = FakePage()
+    registry = EventRegistry(page)
+    calls = []
+
+    with registry.scope():
+        registry.on("console", calls.append)
+        page.emit("console", "inside")
+    page.emit("console", "outside")
+
+    assert calls == ["inside"]
+    assert page._listeners == []
+    assert registry.stats() == {"console": {"emitted": 1, "handler_calls": 1}}
+
+
+def test_once_handlers_run_in_order():
+    """Test one-shot handlers take one event each in registration order"""
+    page = FakePage()
+    registry = EventRegistry(page)
+    calls = []
+    registry.once("dialog", lambda value: calls.append(("first", value)))
+    registry.once("dialog", lambda value: calls.append(("second", value)))
+
+    for value in range(3):
+        page.emit("dialog", value)
+
+    assert calls == [("first", 0), ("second", 1)]
+    assert page._listeners == []
+
+
+def test_leaked_listeners():
+    """Test listeners added around the registry are reported, its own are not"""
+    page = FakePage()
+    page.on("load", print)
+    registry = EventRegistry(page)
+    registry.on("console", print)
+    page.on("console", print)
+    page.on("request", print)
+
+    assert registry.leaked_listeners() == {"console": 1, "request": 1}
+    assert registry.close() == {"console": 1, "request": 1}
+
+
+def test_leaked_listeners_without_emitter():
+    """Test leak detection reports nothing rather than failing when listeners can't be read"""
+    page = FakePage(emitter=False)
+    registry = EventRegistry(page)
+    registry.on("console", print)
+
+    assert registry.listener_counts() == {}
+    assert registry.leaked_listeners() == {}
@@ -77,29 +77,34 @@ def test_dropdown_selection(page: Page):
 
 
 @pytest.mark.smoke
-def test_file_upload(page: Page):
+def test_file_upload(page: Page, file_transfer):
     """Test file upload functionality"""
     page.goto("https://the-internet.herokuapp.com/upload")
     
-    # Create a test file
-    import tempfile
-    import os
+    # Stage a test file
+    test_file = file_transfer.create("upload_test.txt", content="Test file content")
     
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as f:
-        f.write("Test file content")
-        file_path = f.name
+    # Upload file
+    page.locator("#file-upload").set_input_files(test_file.path)
+    page.locator("#file-submit").click()
     
-    try:
-        # Upload file
-        page.locator("#file-upload").set_input_files(file_path)
-        page.locator("#file-submit").click()
-        
-        # Verify upload success
-        expect(page.locator("h3")).to_have_text("File Uploaded!")
-        expect(page.locator("#uploaded-files")).to_contain_text(os.path.basename(file_path))
-    finally:
-        # Cleanup
-        os.unlink(file_path)
+    # Verify upload success
+    expect(page.locator("h3")).to_have_text("File Uploaded!")
+    expect(page.locator("#uploaded-files")).to_contain_text(test_file.name)
+
+
+@pytest.mark.regression
+def test_large_file_selection(page: Page, file_transfer):
+    """Test selecting a large synthetic file for upload"""
+    page.goto("https://the-internet.herokuapp.com/upload")
+    
+    # Generate a 256 MB file in chunks without holding it in memory
+    large_file = file_transfer.create("large_upload.bin", size=256 * 1024 * 1024)
+    
+    # Attach file and verify the browser sees its full size
+    file_input = page.locator("#file-upload")
+    file_input.set_input_files(large_file.path)
+    assert file_input.evaluate("input => input.files[0].size") == large_file.size
 
 
 def test_radio_button_selection(page: Page):
@@ -132,6 +137,15 @@ def test_multi_field_form(page: Page):
     expect(page.locator("#content")).to_contain_text("Your e-mail's been sent!")
 
 
+def test_login_page_structure(page: Page, assert_a11y_snapshot, local_site):
+    """Test login page accessibility tree against its snapshot"""
+    # The local stand-in keeps the snapshot independent of the live site
+    page.goto(local_site + "login.html")
+    
+    # Compare the login form with the stored snapshot
+    assert_a11y_snapshot(locator=page.locator("#login"))
+
+
 def test_form_field_clearing(page: Page):
     """Test clearing form fields"""
     page.goto("https://the-internet.herokuapp.com/login")
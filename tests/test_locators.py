@@ -0,0 +1,51 @@
+import pytest
+
+from utils import locators
+
+
+pytestmark = pytest.mark.no_browser
+
+
+def test_playwright_internals_present():
+    """Test the private Playwright names the profiler wraps still exist"""
+    # The profiler wraps private Playwright names; an upgrade that renames them
+    # would otherwise only show up as an empty profile
+    assert locators.missing_internals() == []
+
+
+def test_profiler_install_wraps_and_restores():
+    """Test installing the profiler wraps locator methods and uninstalling restores them"""
+    profiler = locators.SelectorProfiler()
+    original = locators._LocatorImpl.click
+    profiler.install()
+    try:
+        assert locators._LocatorImpl.click is not original
+    finally:
+        profiler.uninstall()
+    assert locators._LocatorImpl.click is original
+
+
+@pytest.mark.parametrize("selector, codes", [
+    ("[data-id^='row']", {"SEL001"}),
+    ("button, a.primary", {"SEL002"}),
+    ("text=Sign in", {"SEL003"}),
+    ("li:nth-child(2)", {"SEL004"}),
+    ("[href='/cart']", {"SEL005"}),
+    ("div ul li span", {"SEL006"}),
+    ("button", {"SEL007"}),
+    ("#login", set()),
+])
+def test_lint_selector(selector, codes):
+    """Test each lint rule flags its selector and nothing else"""
+    assert {code for code, _ in locators.lint_selector(selector)} == codes
+
+
+def test_lint_source_flags_computed_nth():
+    """Test nth() with a computed index is flagged in source code"""
+    source = (
+        "for i in range(3):\n"
+        "    page.locator('.item').nth(i).click()\n"
+        "page.locator('#cart').click()\n"
+    )
+    findings = locators.lint_source(source, "example.py")
+    assert [(finding.line, finding.code) for finding in findings] == [(2, "SEL008")]
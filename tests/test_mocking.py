@@ -0,0 +1,98 @@
+import re
+
+import pytest
+
+from utils.mocking import MockRouter, glob_to_regex, js_compatible
+
+pytestmark = pytest.mark.no_browser
+
+
+def router(*patterns):
+    mocks = MockRouter()
+    for pattern in patterns:
+        mocks.add(pattern, body=str(pattern))
+    return mocks
+
+
+@pytest.mark.parametrize("glob, url, matched", [
+    ("**/api/users", "https://example.com/api/users", True),
+    ("**/api/users", "https://example.com/api/users/1", False),
+    ("**/api/*", "https://example.com/api/users", True),
+    ("**/api/*", "https://example.com/api/users/1", False),
+    ("**/logo.{png,svg}", "https://example.com/img/logo.svg", True),
+    ("**/search?q=*", "https://example.com/search?q=ada", True),
+    ("https://example.com/", "https://example.com/", True),
+    ("https://example.com/", "https://example.com/about", False),
+])
+def test_glob_routes(glob, url, matched):
+    """Test globs match the whole URL, with * stopping at slashes"""
+    assert (re.fullmatch(glob_to_regex(glob), url) is not None) == matched
+    assert (router(glob).match(url) is not None) == matched
+
+
+def test_first_matching_route_wins():
+    """Test earlier routes take precedence over later overlapping ones"""
+    mocks = router("**/api/users/1", "**/api/users/*", re.compile(r"/api/"))
+
+    assert mocks.match("https://example.com/api/users/1").pattern == "**/api/users/1"
+    assert mocks.match("https://example.com/api/users/2").pattern == "**/api/users/*"
+    assert mocks.match("https://example.com/api/items").pattern.pattern == "/api/"
+    assert mocks.match("https://example.com/home") is None
+
+
+def test_regex_routes_with_named_groups():
+    """Test regexes search anywhere in the URL and may reuse group names"""
+    mocks = router(re.compile(r"/api/users/(?P<id>\d+)$"), re.compile(r"/api/items/(?P<id>\d+)$"))
+
+    assert mocks.match("https://example.com/api/items/7").pattern.pattern.startswith("/api/items")
+    assert mocks.match("https://example.com/api/items/x") is None
+    assert mocks._url_filter.fullmatch("https://example.com/api/users/3")
+
+
+@pytest.mark.parametrize("pattern", [
+    re.compile(r"(?i)/API/STATUS$"),
+    re.compile(r"/(a|b)\1/"),
+    re.compile(r"/api/status", re.IGNORECASE),
+])
+def test_uncombinable_routes_match_one_by_one(pattern):
+    """Test inline flags and backreferences fall back to matching route by route"""
+    mocks = router("**/home", pattern)
+
+    assert mocks.match("https://example.com/home").pattern == "**/home"
+    assert mocks._url_filter is None
+
+
+@pytest.mark.parametrize("pattern, url", [
+    (r"/api/users\Z", "https://example.com/api/users"),
+    (r"\Ahttps://example\.com/api", "https://example.com/api/users"),
+    (r"/api(?#comment)/users", "https://example.com/api/users"),
+    (r"/api/(?>users)", "https://example.com/api/users"),
+    (r"/api/u+s++ers", "https://example.com/api/users"),
+])
+def test_python_only_syntax_stays_in_python(pattern, url):
+    """Test regexes JavaScript reads differently keep the catch-all page.route"""
+    mocks = router("**/home", re.compile(pattern))
+
+    assert mocks.match(url).pattern.pattern == pattern
+    assert mocks._url_filter is None
+    assert not js_compatible(pattern)
+
+
+def test_url_filter_matches_like_the_index():
+    """Test the driver-side filter lets through exactly the URLs a route matches"""
+    mocks = router("**/api/*", re.compile(r"\.json$"), "https://example.com/")
+    urls = ["https://example.com/", "https://example.com/api/users", "https://example.com/api/users/1",
+            "https://example.com/data/list.json", "https://example.com/data/list.json?v=2"]
+
+    matched = [mocks.match(url) is not None for url in urls]
+    assert matched == [True, True, False, True, False]
+    assert [mocks._url_filter.fullmatch(url) is not None for url in urls] == matched
+
+
+def test_routes_added_after_match_are_used():
+    """Test adding a route recompiles the index"""
+    mocks = router("**/api/users")
+    assert mocks.match("https://example.com/api/items") is None
+
+    mocks.add("**/api/items", json=[])
+    assert mocks.match("https://example.com/api/items").pattern == "**/api/items"
@@ -1,5 +1,7 @@
 import pytest
-from playwright.sync_api import Page, expect
+from playwright.sync_api import Page
+
+from utils.performance import expect
 
 @pytest.mark.smoke
 def test_basic_navigation(page: Page):
@@ -9,6 +11,7 @@ def test_basic_navigation(page: Page):
     # Verify page loaded
     expect(page).to_have_url("https://example.com/")
     expect(page).to_have_title("Example Domain")
+    expect(page).to_meet_budget(lcp_ms=2500, cls=0.1, transfer_kb=500)
 
 
 def test_link_navigation(page: Page):
@@ -43,14 +46,15 @@ def test_browser_back_forward(page: Page):
     expect(page).to_have_url("https://the-internet.herokuapp.com/")
 
 
-def test_page_reload(page: Page):
+def test_page_reload(page: Page, fake_clock):
     """Test page reload functionality"""
     page.goto("https://the-internet.herokuapp.com/dynamic_loading/1")
     
     # Click start button
     page.locator("#start button").click()
     
-    # Wait for content to load
+    # Fast-forward the loading delay and wait for content
+    fake_clock.tick(5000)
     page.wait_for_selector("#finish", state="visible")
     
     # Reload page
@@ -128,6 +132,29 @@ def test_multiple_page_navigation(page: Page):
         page.goto(url)
         expect(page).to_have_url(url)
         expect(page.locator("h3, h2")).to_contain_text(expected_heading)
+        expect(page).to_meet_budget(lcp_ms=2500, cls=0.1, transfer_kb=500)
+
+
+def test_crawl_local_site(crawl, local_site):
+    """Test crawling every same-origin link from the home page"""
+    report = crawl(local_site + "index.html", concurrency=3)
+    
+    # External and duplicate links are skipped
+    assert report.pages_checked == 9
+    
+    # Broken link and console error are reported
+    problems = {result.url.rsplit("/", 1)[-1]: result.problems for result in report.failures}
+    assert set(problems) == {"missing.html", "console_error.html"}
+    assert problems["missing.html"] == ["HTTP 404"]
+
+
+@pytest.mark.regression
+def test_crawl_site_links(crawl):
+    """Test link checking across the-internet"""
+    report = crawl("https://the-internet.herokuapp.com/", concurrency=4, max_pages=25)
+    
+    assert report.pages_checked == 25
+    assert report.pages_per_second > 0
 
 
 def test_wait_for_navigation(page: Page):
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from utils.reporting import EventWriter, xml_escape
+
+pytest_plugins = ["pytester"]
+pytestmark = pytest.mark.no_browser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUITE = '''
+import pytest
+
+pytestmark = pytest.mark.no_browser
+
+@pytest.fixture
+def broken():
+    raise RuntimeError("setup broke")
+
+def test_pass():
+    pass
+
+def test_fail():
+    assert "\\x1b[31mred\\x1b[0m" == "plain"
+
+@pytest.mark.skip(reason="not today")
+def test_skip():
+    pass
+
+def test_error(broken):
+    pass
+
+def test_artifact(record_property):
+    record_property("artifact", "trace.zip")
+'''
+
+
+@pytest.fixture
+def streamed(pytester):
+    # The repo's own conftest wires --results-jsonl/--results-junit to the plugin
+    with open(os.path.join(ROOT, "tests", "conftest.py")) as f:
+        pytester.makeconftest(f.read())
+    pytester.makeini(f"[pytest]\npythonpath = {ROOT}\nmarkers =\n    no_browser: no browser page\n")
+    pytester.makepyfile(test_suite=SUITE)
+    result = pytester.runpytest_subprocess("--results-jsonl=events.jsonl", "--results-junit=junit.xml")
+    with open(pytester.path / "events.jsonl") as f:
+        events = [json.loads(line) for line in f]
+    return result, events, ET.parse(pytester.path / "junit.xml").getroot()
+
+
+def test_results_event_sequence(streamed):
+    """Test the JSON lines stream has start, phase and finish events per test"""
+    result, events, _ = streamed
+    result.assert_outcomes(passed=2, failed=1, skipped=1, errors=1)
+
+    assert events[0]["event"] == "session_start"
+    assert events[-1]["event"] == "session_finish"
+    assert events[-1]["exit_status"] == 1
+    by_test = {}
+    for event in events[1:-1]:
+        by_test.setdefault(event["nodeid"].rpartition("::")[2], []).append(event)
+    assert [(e["event"], e.get("phase")) for e in by_test["test_pass"]] == [
+        ("start", None), ("phase", "setup"), ("phase", "call"), ("phase", "teardown"), ("finish", None),
+    ]
+    finished = {name: test_events[-1] for name, test_events in by_test.items()}
+    assert {name: event["outcome"] for name, event in finished.items()} == {
+        "test_pass": "passed", "test_fail": "failed", "test_skip": "skipped",
+        "test_error": "error", "test_artifact": "passed",
+    }
+    assert set(finished["test_pass"]["phases"]) == {"setup", "call", "teardown"}
+    assert finished["test_artifact"]["artifacts"] == ["trace.zip"]
+
+
+def test_results_junit(streamed):
+    """Test the JUnit XML parses and counts outcomes when messages hold ANSI escapes"""
+    _, _, suite = streamed
+
+    assert (suite.get("tests"), suite.get("failures"), suite.get("errors"), suite.get("skipped")) == ("5", "1", "1", "1")
+    cases = {case.get("name"): case for case in suite.iter("testcase")}
+    assert cases["test_pass"].get("classname") == "test_suite"
+    failure = cases["test_fail"].find("failure")
+    assert "#x1B[31mred#x1B[0m" in failure.text
+    assert "\x1b" not in failure.text
+    assert "setup broke" in cases["test_error"].find("error").text
+    assert cases["test_skip"].find("skipped") is not None
+
+
+def test_xml_escape():
+    """Test XML-illegal characters are replaced and the rest is kept"""
+    assert xml_escape("a\x1b[0mb\x00\tcé") == "a#x1B[0mb#x00\tcé"
+
+
+def test_event_writer_batches(tmp_path, monkeypatch):
+    """Test queued events are written in batches and flushed on close"""
+    batches = []
+    emitted = threading.Event()
+    write = EventWriter._write
+
+    def record(self, data):
+        # Hold the first write until every event is queued, so later batches fill up
+        emitted.wait(5)
+        batches.append(data.count(b"\n"))
+        write(self, data)
+
+    monkeypatch.setattr(EventWriter, "_write", record)
+    path = tmp_path / "events.jsonl"
+    writer = EventWriter(str(path), batch_size=100, flush_interval=0.01)
+    for index in range(350):
+        writer.emit({"index": index})
+    emitted.set()
+    writer.close()
+
+    assert not writer._thread.is_alive()
+    assert [json.loads(line)["index"] for line in path.read_text().splitlines()] == list(range(350))
+    assert sum(batches) == 350
+    assert max(batches) <= 100
+    assert len(batches) <= 5
+
+
+def test_event_writer_rejects_fsync_mode(tmp_path):
+    """Test an unknown fsync mode is refused before anything is opened"""
+    with pytest.raises(ValueError, match="fsync"):
+        EventWriter(str(tmp_path / "events.jsonl"), fsync="always")
+    assert not (tmp_path / "events.jsonl").exists()
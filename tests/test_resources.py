@@ -0,0 +1,163 @@
+import pytest
+
+from utils import resources
+from utils.resources import MB, BrowserScheduler, ContextSlots
+
+pytestmark = pytest.mark.no_browser
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def close(self):
+        self.connected = False
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    """Settable stand-ins for the host's memory readings, in MB."""
+    state = {"available": 8192, "total": 16384, "rss": 100}
+    monkeypatch.setattr(resources, "available_memory", lambda: state["available"] * MB)
+    monkeypatch.setattr(resources, "total_memory", lambda: state["total"] * MB)
+    monkeypatch.setattr(resources, "child_process_rss", lambda pid=None: state["rss"] * MB)
+    return state
+
+
+@pytest.fixture
+def scheduler(tmp_path, memory):
+    launched = []
+
+    def launch():
+        launched.append(FakeBrowser())
+        return launched[-1]
+
+    def make(**options):
+        options.setdefault("poll_interval", 0.01)
+        options.setdefault("max_contexts", 2)
+        made = BrowserScheduler(launch, slots=ContextSlots(str(tmp_path / "slots")), **options)
+        made.launched = launched
+        return made
+    return make
+
+
+def test_context_slots_limit(tmp_path):
+    """Test slots are shared through lock files up to the limit"""
+    holders = [ContextSlots(str(tmp_path)) for _ in range(3)]
+
+    assert holders[0].try_acquire(2)
+    assert holders[1].try_acquire(2)
+    assert not holders[2].try_acquire(2)
+    assert holders[2].busy() == 2
+
+    holders[0].release()
+    assert holders[2].busy() == 1
+    assert holders[2].try_acquire(2)
+
+
+def test_context_limit_from_total_memory(scheduler, memory):
+    """Test the slot count is capped by total memory, but never below one"""
+    memory["total"] = 2048
+    assert scheduler(max_contexts=8, min_free_mb=1024, context_mb=250)._context_limit() == 4
+
+    memory["total"] = 512
+    assert scheduler(max_contexts=8, min_free_mb=1024, context_mb=250)._context_limit() == 1
+
+
+def test_acquire_reuses_browser(scheduler):
+    """Test tests share one browser and hold a slot while they run"""
+    browsers = scheduler()
+
+    first = browsers.acquire()
+    assert browsers.slots.busy() == 1
+    browsers.release()
+    assert browsers.slots.busy() == 0
+
+    assert browsers.acquire() is first
+    browsers.release()
+    assert len(browsers.launched) == 1
+    assert browsers.waits == 0
+
+
+def test_forced_start_when_slots_stay_full(scheduler, tmp_path):
+    """Test a start is forced after max_wait when every slot stays taken"""
+    other = ContextSlots(str(tmp_path / "slots"))
+    assert other.try_acquire(1)
+    browsers = scheduler(max_contexts=1, max_wait=0.05)
+
+    browsers.acquire()
+
+    assert browsers.forced_starts == 1
+    assert browsers.waits == 1
+    assert browsers.wait_seconds >= 0.05
+
+
+def test_low_memory_with_nothing_to_free_starts_now(scheduler, memory):
+    """Test low memory doesn't delay a start when no other test holds a slot"""
+    memory["available"] = 100
+    browsers = scheduler(min_free_mb=1024, max_wait=5)
+
+    browsers.acquire()
+
+    assert browsers.low_memory_starts == 1
+    assert browsers.waits == 0
+    assert browsers.slots.busy() == 1
+
+
+def test_low_memory_waits_for_running_tests(scheduler, tmp_path, monkeypatch):
+    """Test low memory delays a start while another test holds a slot that could free it"""
+    other = ContextSlots(str(tmp_path / "slots"))
+    assert other.try_acquire(2)
+    readings = iter([100, 100])
+    monkeypatch.setattr(resources, "available_memory", lambda: next(readings, 4096) * MB)
+    browsers = scheduler(min_free_mb=1024, max_wait=5)
+
+    browsers.acquire()
+
+    assert browsers.waits == 1
+    assert browsers.low_memory_starts == 0
+    assert browsers.forced_starts == 0
+
+
+def test_recycle_by_test_count(scheduler):
+    """Test the browser is replaced after max_tests_per_browser tests"""
+    browsers = scheduler(max_tests_per_browser=2)
+
+    for _ in range(3):
+        browsers.acquire()
+        browsers.release()
+
+    assert browsers.recycles == {"tests": 1, "memory": 0}
+    assert [browser.connected for browser in browsers.launched] == [False, True]
+
+
+def test_recycle_by_memory_growth(scheduler, memory):
+    """Test the browser is replaced once its processes grew past max_growth_mb"""
+    browsers = scheduler(max_growth_mb=512)
+
+    browsers.acquire()
+    memory["rss"] = 400
+    browsers.release()
+    assert browsers.browser is not None
+
+    browsers.acquire()
+    memory["rss"] = 700
+    browsers.release()
+
+    assert browsers.recycles == {"tests": 0, "memory": 1}
+    assert browsers.browser is None
+    assert browsers.peak_rss == 700 * MB
+
+
+def test_disconnected_browser_is_relaunched(scheduler):
+    """Test a crashed browser is replaced on the next acquire"""
+    browsers = scheduler()
+    crashed = browsers.acquire()
+    browsers.release()
+    crashed.connected = False
+
+    assert browsers.acquire() is not crashed
+    assert len(browsers.launched) == 2
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+
+import pytest
+
+from utils.sharding import load_durations, merge, parse_shard, partition
+
+
+pytestmark = pytest.mark.no_browser
+
+
+def write_bundle(root, shard, total, timings, artifact=None):
+    """Write a shard bundle like ShardPlugin does and return its path."""
+    bundle = root / f"shard-{shard}-of-{total}"
+    bundle.mkdir(parents=True)
+    if artifact:
+        (bundle / "artifacts").mkdir()
+        (bundle / "artifacts" / artifact).write_text("trace")
+    manifest = {"shard": shard, "total": total, "tests": list(timings), "exit_status": 0,
+                "started": 0.0, "wall_time": sum(t["duration"] for t in timings.values())}
+    (bundle / "manifest.json").write_text(json.dumps(manifest))
+    (bundle / "timings.json").write_text(json.dumps(timings))
+    (bundle / "results.jsonl").write_text("".join(
+        json.dumps({"event": "test", "nodeid": nodeid, "outcome": t["outcome"]}) + "\n"
+        for nodeid, t in timings.items()))
+    (bundle / "junit.xml").write_text(f'<testsuite name="pytest" tests="{len(timings)}"/>')
+    return str(bundle)
+
+
+def timing(duration, outcome="passed", artifacts=()):
+    return {"outcome": outcome, "duration": duration, "phases": {"call": duration},
+            "artifacts": list(artifacts)}
+
+
+@pytest.fixture
+def bundles(tmp_path):
+    return [
+        write_bundle(tmp_path / "in", 1, 2, {"t.py::a": timing(3.0), "t.py::b": timing(1.0, "failed")}),
+        write_bundle(tmp_path / "in", 2, 2, {"t.py::c": timing(2.0, artifacts=["artifacts/0-trace.zip"])},
+                     artifact="0-trace.zip"),
+    ]
+
+
+@pytest.mark.parametrize("value, expected", [("1/1", (1, 1)), ("2/4", (2, 4))])
+def test_parse_shard(value, expected):
+    """Test parsing a valid i/N shard spec"""
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "2", "a/b", "1/2/3"])
+def test_parse_shard_rejects(value):
+    """Test malformed and out-of-range shard specs are rejected"""
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(value)
+
+
+def test_partition_balances_by_duration():
+    """Test shards get equal total duration and keep the collected order"""
+    nodeids = ["a", "b", "c", "d", "e"]
+    durations = {"a": 5.0, "b": 1.0, "c": 4.0, "d": 2.0, "e": 2.0}
+    shards = partition(nodeids, durations, 2)
+    assert sorted(sum(shards, [])) == nodeids
+    loads = [sum(durations[nodeid] for nodeid in shard) for shard in shards]
+    assert loads == [7.0, 7.0]
+    # Each shard keeps the collected order
+    assert all(shard == sorted(shard, key=nodeids.index) for shard in shards)
+
+
+def test_partition_is_deterministic_without_history():
+    """Test tests without recorded durations are spread evenly and reproducibly"""
+    nodeids = [f"t.py::test_{i}" for i in range(7)]
+    shards = partition(nodeids, {}, 3)
+    assert [len(shard) for shard in shards] == [3, 2, 2]
+    assert partition(nodeids, {}, 3) == shards
+
+
+def test_partition_uses_median_for_unknown_tests():
+    """Test a test without history counts as the median duration"""
+    shards = partition(["slow", "x", "y"], {"slow": 10.0, "x": 1.0}, 2)
+    # "y" counts as the median (5.5) and goes next to "x", away from "slow"
+    assert shards == [["slow"], ["x", "y"]]
+
+
+def test_partition_more_shards_than_tests():
+    """Test surplus shards are left empty"""
+    assert partition(["a"], {}, 3) == [["a"], [], []]
+
+
+def test_merge(tmp_path, bundles):
+    """Test merging bundles into one report and duration history"""
+    output = tmp_path / "merged"
+    durations = tmp_path / "durations.json"
+    summary = merge(bundles, str(output), str(durations))
+
+    assert summary["tests"] == 3
+    assert summary["outcomes"] == {"passed": 2, "failed": 1}
+    assert summary["missing_shards"] == [] and summary["duplicated_shards"] == []
+    assert summary["wall_time"] == 4.0
+    timings = json.loads((output / "timings.json").read_text())
+    assert timings["t.py::c"]["shard"] == 2
+    assert timings["t.py::c"]["artifacts"] == [os.path.join("artifacts", "shard-2", "0-trace.zip")]
+    assert (output / "artifacts" / "shard-2" / "0-trace.zip").read_text() == "trace"
+    events = [json.loads(line) for line in (output / "results.jsonl").read_text().splitlines()]
+    assert [event["shard"] for event in events] == [1, 1, 2]
+    assert "shard-2-of-2" in (output / "junit.xml").read_text()
+    assert load_durations(str(durations)) == {"t.py::a": 3.0, "t.py::b": 1.0, "t.py::c": 2.0}
+
+    # A second merge replaces the earlier report
+    merge(bundles[:1], str(output), str(durations))
+    assert not (output / "artifacts").exists()
+    assert load_durations(str(durations))["t.py::a"] == 3.0
+
+
+def test_merge_reports_missing_shards(tmp_path, bundles):
+    """Test a shard without a bundle is reported as missing"""
+    summary = merge(bundles[1:], str(tmp_path / "merged"), str(tmp_path / "durations.json"))
+    assert summary["missing_shards"] == [1]
+
+
+def test_merge_skips_crashed_shard(tmp_path, bundles):
+    """Test a bundle without a manifest is skipped and its shard reported missing"""
+    os.remove(os.path.join(bundles[0], "manifest.json"))
+    summary = merge(bundles, str(tmp_path / "merged"), str(tmp_path / "durations.json"))
+    assert summary["missing_shards"] == [1]
+    assert summary["incomplete_bundles"] == [bundles[0]]
+    assert summary["tests"] == 1
+
+
+def test_merge_without_complete_bundles(tmp_path, bundles):
+    """Test merging only crashed shards is refused"""
+    for bundle in bundles:
+        os.remove(os.path.join(bundle, "manifest.json"))
+    with pytest.raises(ValueError, match="no shard bundles"):
+        merge(bundles, str(tmp_path / "merged"), str(tmp_path / "durations.json"))
+
+
+def test_merge_rejects_mixed_shard_counts(tmp_path, bundles):
+    """Test bundles from different shard counts are not merged"""
+    other = write_bundle(tmp_path / "other", 1, 3, {"t.py::a": timing(1.0)})
+    with pytest.raises(ValueError, match="different shard counts"):
+        merge([bundles[0], other], str(tmp_path / "merged"), str(tmp_path / "durations.json"))
+
+
+@pytest.mark.parametrize("output", [".", "in", "in/shard-1-of-2", "in/shard-1-of-2/merged"])
+def test_merge_refuses_output_overlapping_bundles(tmp_path, bundles, output):
+    """Test an output that overlaps a bundle is refused before anything is deleted"""
+    with pytest.raises(ValueError, match="overlaps"):
+        merge(bundles, str(tmp_path / output), str(tmp_path / "durations.json"))
+    assert os.path.exists(os.path.join(bundles[0], "results.jsonl"))
+
+
+def test_merge_refuses_unrelated_directory(tmp_path, bundles):
+    """Test a non-empty output that isn't an earlier merge is left alone"""
+    output = tmp_path / "reports"
+    output.mkdir()
+    (output / "keep.txt").write_text("not a merge")
+    with pytest.raises(ValueError, match="not empty"):
+        merge(bundles, str(output), str(tmp_path / "durations.json"))
+    assert (output / "keep.txt").exists()
@@ -0,0 +1 @@
+"""Reusable helpers shared by the test suite and conftest fixtures."""
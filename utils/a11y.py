@@ -0,0 +1,291 @@
+"""Accessibility-tree snapshots with incremental diffing.
+
+A snapshot is captured with a single ``aria_snapshot()`` call, parsed into a
+tree and stored in a compact normalized form in a per-module JSON file next
+to the tests.  Comparison hashes every subtree first, so identical subtrees
+are skipped in constant time, and aligns the children of changed nodes with
+a sequence matcher; only the parts of a large tree that actually changed
+are walked.
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent writers are not serialized
+    fcntl = None
+
+from playwright.sync_api import Locator
+
+KEY_PATTERN = re.compile(r'^(?P<role>[\w-]+)(?: "(?P<name>(?:[^"\\]|\\.)*)")?(?P<attrs>(?: \[[^\]]*\])*)$')
+WHITESPACE = re.compile(r"\s+")
+
+
+class Node:
+    """One accessibility node: role, name, attributes, inline text and children."""
+
+    __slots__ = ("role", "name", "attrs", "text", "children", "_digest")
+
+    def __init__(self, role, name="", attrs="", text="", children=None):
+        self.role = role
+        self.name = name
+        self.attrs = attrs
+        self.text = text
+        self.children = children or []
+        self._digest = None
+
+    @property
+    def label(self):
+        label = self.role
+        if self.name:
+            label += f' "{self.name}"'
+        if self.attrs:
+            label += f" {self.attrs}"
+        if self.text:
+            label += f": {self.text}"
+        return label
+
+    @property
+    def key(self):
+        """Identity used to align siblings: role and name."""
+        return self.role, self.name
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(self.label.encode())
+            for child in self.children:
+                h.update(child.digest)
+            self._digest = h.digest()
+        return self._digest
+
+    def to_compact(self):
+        data = {"r": self.role}
+        if self.name:
+            data["n"] = self.name
+        if self.attrs:
+            data["a"] = self.attrs
+        if self.text:
+            data["t"] = self.text
+        if self.children:
+            data["c"] = [child.to_compact() for child in self.children]
+        return data
+
+    @classmethod
+    def from_compact(cls, data):
+        return cls(data["r"], data.get("n", ""), data.get("a", ""), data.get("t", ""),
+                   [cls.from_compact(child) for child in data.get("c", [])])
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1].replace("''", "'")
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return json.loads(value)
+    return value
+
+
+def _split_entry(entry):
+    """Split ``key: value`` from an aria snapshot line, honouring YAML quoting."""
+    if entry[:1] in ("'", '"'):
+        quote = entry[0]
+        i = 1
+        while i < len(entry):
+            if entry[i] == quote:
+                if quote == "'" and entry[i + 1:i + 2] == "'":
+                    i += 2
+                    continue
+                break
+            if quote == '"' and entry[i] == "\\":
+                i += 1
+            i += 1
+        key, rest = _unquote(entry[:i + 1]), entry[i + 1:]
+        if rest.startswith(":"):
+            return key, _unquote(rest[1:].strip())
+        return key, None
+    # The key ends at the first ': ' (or trailing ':') outside the quoted name.
+    match = re.match(r'^((?:[^":]|"(?:[^"\\]|\\.)*")*)(?::(?: (.*))?)?$', entry)
+    key, value = match.group(1), match.group(2)
+    return key, _unquote(value) if value is not None else None
+
+
+def normalize_text(text, masks=()):
+    text = WHITESPACE.sub(" ", text).strip()
+    for mask in masks:
+        text = re.sub(mask, "*", text)
+    return text
+
+
+def parse_aria_snapshot(snapshot, masks=()):
+    """Parse the YAML-like output of ``aria_snapshot()`` into a tree under a ``root`` node."""
+    root = Node("root")
+    stack = [(-1, root)]
+    for line in snapshot.splitlines():
+        stripped = line.lstrip(" ")
+        if not stripped.startswith("- "):
+            continue
+        indent = len(line) - len(stripped)
+        key, value = _split_entry(stripped[2:])
+        while stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+
+        if key.startswith("/"):
+            # Properties such as /url or /placeholder become attributes.
+            prop = f"[{key[1:]}={normalize_text(value or '', masks)}]"
+            parent.attrs = f"{parent.attrs} {prop}".strip()
+            continue
+
+        match = KEY_PATTERN.match(key.strip())
+        if match is None:
+            node = Node("text", text=normalize_text(key, masks))
+        else:
+            name = match.group("name") or ""
+            node = Node(
+                match.group("role"),
+                normalize_text(name.replace('\\"', '"'), masks),
+                match.group("attrs").strip(),
+                normalize_text(value or "", masks),
+            )
+        parent.children.append(node)
+        stack.append((indent, node))
+    return root
+
+
+def diff_trees(old, new, path=""):
+    """List the differences between two trees as ``(kind, path, detail)`` tuples."""
+    if old.digest == new.digest:
+        return []
+    here = f"{path}/{new.label}" if path else new.label
+    changes = []
+    if old.label != new.label:
+        changes.append(("changed", path or "/", f"{old.label} -> {new.label}"))
+
+    matcher = difflib.SequenceMatcher(None, [c.key for c in old.children],
+                                      [c.key for c in new.children], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for old_child, new_child in zip(old.children[i1:i2], new.children[j1:j2]):
+                changes.extend(diff_trees(old_child, new_child, here))
+            continue
+        if tag == "replace" and i2 - i1 == j2 - j1:
+            for old_child, new_child in zip(old.children[i1:i2], new.children[j1:j2]):
+                changes.extend(diff_trees(old_child, new_child, here))
+            continue
+        for child in old.children[i1:i2]:
+            changes.append(("removed", here, child.label))
+        for child in new.children[j1:j2]:
+            changes.append(("added", here, child.label))
+    return changes
+
+
+def format_diff(changes, limit=50):
+    symbols = {"added": "+", "removed": "-", "changed": "~", "missing": "!"}
+    lines = [f"{symbols[kind]} {path}: {detail}" for kind, path, detail in changes[:limit]]
+    if len(changes) > limit:
+        lines.append(f"... and {len(changes) - limit} more")
+    return "\n".join(lines)
+
+
+class SnapshotFile:
+    """Snapshots for one test module, read on first use and merged into the file on save."""
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshots = None
+        self._changed = {}
+
+    @property
+    def dirty(self):
+        return bool(self._changed)
+
+    def _read(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                return json.load(f)
+        return {}
+
+    @property
+    def snapshots(self):
+        if self._snapshots is None:
+            self._snapshots = self._read()
+        return self._snapshots
+
+    def get(self, name):
+        data = self.snapshots.get(name)
+        return Node.from_compact(data) if data is not None else None
+
+    def put(self, name, tree):
+        self.snapshots[name] = self._changed[name] = tree.to_compact()
+
+    def save(self):
+        """Write this process's changes on top of the file's current contents.
+
+        xdist workers and shard processes each hold a store for the same
+        files; the lock and re-read keep them from dropping each other's
+        entries.
+        """
+        if not self._changed:
+            return
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            snapshots = self._read()
+            snapshots.update(self._changed)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshots, f, indent=1, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp, self.path)
+        self._snapshots = snapshots
+        self._changed = {}
+
+
+class SnapshotStore:
+    """Per-module snapshot files under a ``__snapshots__`` directory."""
+
+    def __init__(self, update=False):
+        self.update = update
+        self.files = {}
+        self.recorded = 0
+        self.updated = 0
+
+    def file_for(self, module_path):
+        directory = os.path.join(os.path.dirname(module_path), "__snapshots__")
+        path = os.path.join(directory, os.path.splitext(os.path.basename(module_path))[0] + ".a11y.json")
+        if path not in self.files:
+            self.files[path] = SnapshotFile(path)
+        return self.files[path]
+
+    def check(self, module_path, name, locator: Locator, masks=()):
+        """Compare the locator's tree with the stored snapshot.
+
+        In update mode missing or changed snapshots are (re)recorded;
+        otherwise a missing snapshot is reported as a ``missing`` change.
+        """
+        tree = parse_aria_snapshot(locator.aria_snapshot(), masks)
+        snapshot_file = self.file_for(module_path)
+        stored = snapshot_file.get(name)
+        if stored is None:
+            if not self.update:
+                return [("missing", name, f"no snapshot in {snapshot_file.path}")]
+            snapshot_file.put(name, tree)
+            self.recorded += 1
+            return []
+        changes = diff_trees(stored, tree)
+        if changes and self.update:
+            snapshot_file.put(name, tree)
+            self.updated += 1
+            return []
+        return changes
+
+    def save(self):
+        for snapshot_file in self.files.values():
+            snapshot_file.save()
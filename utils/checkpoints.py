@@ -0,0 +1,155 @@
+"""Named browser-state checkpoints to skip repeated multi-step setup.
+
+The first test that asks for a checkpoint runs its setup steps and captures
+the resulting cookies, localStorage, sessionStorage and URL.  Later tests
+restore that state into their own fresh context and land directly on the
+captured URL.  A cheap probe validates each restore; if it fails, the setup
+steps are replayed instead.
+"""
+import json
+from urllib.parse import urlsplit
+
+from playwright.sync_api import Error, Page
+
+SESSION_STORAGE_SCRIPT = "() => Object.assign({}, sessionStorage)"
+
+# Seeds storage for the checkpoint's origins the first time a document from
+# that origin loads in the context, then leaves the app's own writes alone.
+RESTORE_SCRIPT = """
+(() => {
+  const data = %s;
+  const marker = '__checkpoint__:' + data.name;
+  const local = data.local[location.origin];
+  if (local && !localStorage.getItem(marker)) {
+    Object.entries(local).forEach(([key, value]) => localStorage.setItem(key, value));
+    localStorage.setItem(marker, '1');
+  }
+  const session = data.session[location.origin];
+  if (session && !sessionStorage.getItem(marker)) {
+    Object.entries(session).forEach(([key, value]) => sessionStorage.setItem(key, value));
+    sessionStorage.setItem(marker, '1');
+  }
+})();
+"""
+
+# Clears the restored state but keeps the markers, so the restore script
+# does not seed it again while the setup steps are replayed.
+RESET_SCRIPT = """
+name => {
+  const marker = '__checkpoint__:' + name;
+  localStorage.clear();
+  sessionStorage.clear();
+  localStorage.setItem(marker, '1');
+  sessionStorage.setItem(marker, '1');
+}
+"""
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class Checkpoint:
+    """Captured state of a context after a setup path ran."""
+
+    def __init__(self, name, cookies, local_storage, session_storage, url):
+        self.name = name
+        self.cookies = cookies
+        self.local_storage = local_storage
+        self.session_storage = session_storage
+        self.url = url
+
+    @classmethod
+    def capture(cls, name, page: Page):
+        state = page.context.storage_state()
+        local_storage = {
+            origin["origin"]: {item["name"]: item["value"] for item in origin["localStorage"]}
+            for origin in state["origins"]
+        }
+        origin = page.evaluate("location.origin")
+        session_storage = {origin: page.evaluate(SESSION_STORAGE_SCRIPT)}
+        return cls(name, state["cookies"], local_storage, session_storage, page.url)
+
+    def restore(self, page: Page):
+        if self.cookies:
+            page.context.add_cookies(self.cookies)
+        data = {"name": self.name, "local": self.local_storage, "session": self.session_storage}
+        page.context.add_init_script(RESTORE_SCRIPT % json.dumps(data))
+        page.goto(self.url)
+
+    def reset(self, page: Page):
+        """Clear restored state on every origin it was seeded into, keeping the markers."""
+        page.context.clear_cookies()
+        origins = set(self.local_storage) | set(self.session_storage)
+        # Storage can only be cleared from a document of its own origin; a
+        # failed restore may have left the page on about:blank.
+        for origin in sorted(origins, key=lambda o: o != _origin(self.url)):
+            if _origin(page.url) != origin:
+                page.goto(self.url if origin == _origin(self.url) else origin + "/")
+            page.evaluate(RESET_SCRIPT, self.name)
+
+
+class CheckpointStore:
+    """Checkpoints recorded during the current test run, by name."""
+
+    def __init__(self):
+        self.checkpoints = {}
+        self.recorded = 0
+        self.restored = 0
+        self.replayed = 0
+        self.failures = []
+
+    def reach(self, page: Page, name, setup, probe=None):
+        """Bring ``page`` to checkpoint ``name``, recording it on first use.
+
+        ``setup(page)`` performs the steps from a blank page; ``probe(page)``
+        returns truthy when the page is in the expected state.
+        """
+        checkpoint = self.checkpoints.get(name)
+        if checkpoint is None:
+            setup(page)
+            self.checkpoints[name] = Checkpoint.capture(name, page)
+            self.recorded += 1
+            return page
+
+        reason = self._restore(checkpoint, page, probe)
+        if reason is None:
+            self.restored += 1
+            return page
+
+        self.failures.append((name, reason))
+        checkpoint.reset(page)
+        setup(page)
+        self.replayed += 1
+        return page
+
+    @staticmethod
+    def _restore(checkpoint, page, probe):
+        """Restore ``checkpoint``; return why it failed, or None on success."""
+        try:
+            checkpoint.restore(page)
+        except Error as e:
+            return f"restore failed: {str(e).splitlines()[0]}"
+        try:
+            if probe is not None and not probe(page):
+                return f"probe failed on {page.url}"
+        except Error as e:
+            return f"probe raised: {str(e).splitlines()[0]}"
+        return None
+
+    def clear(self):
+        self.checkpoints.clear()
+        self.recorded = self.restored = self.replayed = 0
+        self.failures.clear()
+
+    def summary(self):
+        lines = [
+            f"{len(self.checkpoints)} checkpoint(s): {self.recorded} recorded, "
+            f"{self.restored} restored, {self.replayed} replayed after a failed restore"
+        ]
+        lines.extend(f"  {name}: {reason}" for name, reason in self.failures)
+        return "\n".join(lines)
+
+
+store = CheckpointStore()
@@ -0,0 +1,46 @@
+"""Controllable clock for pages with timer-driven behaviour.
+
+A thin wrapper over Playwright's ``page.clock``, which fakes
+``setTimeout``, ``setInterval``, ``requestAnimationFrame``, ``Date`` and
+``performance.now`` in every page of the context.  Time keeps flowing at
+its normal rate, so a timer the page schedules late still fires; ``tick``
+jumps ahead and runs every timer that falls due on the way, in order,
+without waiting in real time.  ``pause`` stops the flow, for tests that
+assert on the exact millisecond a timer fires.
+"""
+from playwright.sync_api import Page
+
+
+class FakeClock:
+    """Python handle for the clock installed in a page's context."""
+
+    def __init__(self, page: Page, start=None):
+        self.page = page
+        self.start = start
+        self.installed = False
+
+    def install(self):
+        """Install the clock for every document the context loads from now on."""
+        if not self.installed:
+            if self.start is None:
+                self.page.clock.install()
+            else:
+                self.page.clock.install(time=self.start)
+            self.installed = True
+        return self
+
+    def pause(self):
+        """Stop time at its current value; only ``tick`` and ``fast_forward`` move it on."""
+        self.page.clock.pause_at(self.now())
+        return self
+
+    def tick(self, ms):
+        """Advance time by ``ms`` milliseconds, firing due timers along the way."""
+        self.page.clock.run_for(ms)
+
+    def fast_forward(self, ms):
+        """Jump ahead by ``ms`` milliseconds, firing due timers at most once."""
+        self.page.clock.fast_forward(ms)
+
+    def now(self):
+        return self.page.evaluate("Date.now()")
@@ -0,0 +1,244 @@
+"""Same-origin crawler and link checker.
+
+Starting from a seed URL, the crawler visits every same-origin link it can
+find with a pool of pages working concurrently.  Each page is checked for
+its HTTP status, console errors and the presence of a heading.  Memory stays
+bounded on large sites: visited URLs are kept as 8-byte digests of their
+normalized form, the frontier has a fixed capacity and only failing pages
+are kept in the report.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from playwright.async_api import async_playwright
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+LINKS_SCRIPT = "links => links.map(link => link.href)"
+# Chromium also logs failed requests as console errors; the status check covers them.
+NETWORK_ERROR_PREFIX = "Failed to load resource"
+
+
+def normalize_url(url, base=None):
+    """Canonical form of ``url`` used for deduplication, or None if not crawlable."""
+    if base is not None:
+        url = urljoin(base, url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return None
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc
+
+
+class VisitedSet:
+    """Set of normalized URLs stored as fixed-size digests."""
+
+    def __init__(self):
+        self._digests = set()
+
+    @staticmethod
+    def _digest(url):
+        return hashlib.blake2b(url.encode(), digest_size=8).digest()
+
+    def add(self, url):
+        """Add ``url``; return False if it was already present."""
+        digest = self._digest(url)
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def __contains__(self, url):
+        return self._digest(url) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+
+def _first_line(error):
+    return (str(error) or type(error).__name__).splitlines()[0]
+
+
+class PageResult:
+    def __init__(self, url, status, console_errors, has_heading, error=None):
+        self.url = url
+        self.status = status
+        self.console_errors = console_errors
+        self.has_heading = has_heading
+        self.error = error
+
+    @property
+    def problems(self):
+        problems = []
+        if self.error:
+            problems.append(self.error)
+        if self.status is not None and self.status >= 400:
+            problems.append(f"HTTP {self.status}")
+        if self.console_errors:
+            problems.append(f"{len(self.console_errors)} console error(s): {self.console_errors[0]}")
+        if not self.has_heading and not self.error:
+            problems.append("no heading")
+        return problems
+
+    @property
+    def ok(self):
+        return not self.problems
+
+    def __repr__(self):
+        return f"PageResult({self.url!r}, problems={self.problems})"
+
+
+class CrawlReport:
+    """Counters for the whole crawl plus the results of failing pages."""
+
+    def __init__(self, max_failures=1000):
+        self.pages_checked = 0
+        self.links_dropped = 0
+        self.failures = []
+        self.failure_count = 0
+        self.max_failures = max_failures
+        self.elapsed = 0.0
+
+    def add(self, result):
+        self.pages_checked += 1
+        if not result.ok:
+            self.failure_count += 1
+            if len(self.failures) < self.max_failures:
+                self.failures.append(result)
+
+    @property
+    def pages_per_second(self):
+        return self.pages_checked / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.pages_checked} pages checked in {self.elapsed:.2f}s "
+            f"({self.pages_per_second:.1f} pages/s), {self.failure_count} with problems, "
+            f"{self.links_dropped} links dropped by the frontier limit"
+        )
+
+
+class Crawler:
+    """Crawl a site from ``seed`` with ``concurrency`` pages in one context."""
+
+    def __init__(self, seed, concurrency=4, max_pages=None, max_frontier=10000,
+                 heading_selector="h1, h2, h3", browser_name="chromium",
+                 launch_args=None, timeout=15000):
+        self.seed = normalize_url(seed)
+        self.origin = _origin(self.seed)
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.max_frontier = max_frontier
+        self.heading_selector = heading_selector
+        self.browser_name = browser_name
+        self.launch_args = launch_args or {}
+        self.timeout = timeout
+        self.visited = VisitedSet()
+        self.report = CrawlReport()
+
+    def run(self):
+        """Crawl synchronously and return the report.
+
+        The crawl runs on its own event loop in a worker thread so it can be
+        used from tests that already drive Playwright's sync API.
+        """
+        errors = []
+
+        def target():
+            try:
+                asyncio.run(self.crawl())
+            except BaseException as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=target, name="crawler")
+        thread.start()
+        thread.join()
+        if errors:
+            raise errors[0]
+        return self.report
+
+    async def crawl(self):
+        started = time.perf_counter()
+        frontier = asyncio.Queue(maxsize=self.max_frontier)
+        self.visited.add(self.seed)
+        frontier.put_nowait(self.seed)
+
+        async with async_playwright() as playwright:
+            browser = await getattr(playwright, self.browser_name).launch(**self.launch_args)
+            context = await browser.new_context()
+            context.set_default_timeout(self.timeout)
+            workers = [
+                asyncio.create_task(self._worker(await context.new_page(), frontier))
+                for _ in range(self.concurrency)
+            ]
+            await frontier.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await browser.close()
+
+        self.report.elapsed = time.perf_counter() - started
+        return self.report
+
+    def _budget_left(self):
+        return self.max_pages is None or len(self.visited) < self.max_pages
+
+    async def _worker(self, page, frontier):
+        console_errors = []
+
+        def on_console(msg):
+            if msg.type == "error" and not msg.text.startswith(NETWORK_ERROR_PREFIX):
+                console_errors.append(msg.text)
+
+        page.on("console", on_console)
+        page.on("pageerror", lambda error: console_errors.append(str(error)))
+        while True:
+            url = await frontier.get()
+            try:
+                console_errors.clear()
+                try:
+                    result, links = await self._check(page, url, console_errors)
+                except Exception as e:
+                    # e.g. "Execution context was destroyed" after a JS redirect;
+                    # a dead worker would leave frontier.join() waiting forever.
+                    result, links = PageResult(url, None, list(console_errors), False,
+                                               error=_first_line(e)), []
+                self.report.add(result)
+                self._enqueue(links, frontier)
+            finally:
+                frontier.task_done()
+
+    async def _check(self, page, url, console_errors):
+        try:
+            response = await page.goto(url)
+        except Exception as e:
+            return PageResult(url, None, [], False, error=_first_line(e)), []
+        status = response.status if response else None
+        has_heading = await page.locator(self.heading_selector).count() > 0
+        links = await page.eval_on_selector_all("a[href]", LINKS_SCRIPT)
+        return PageResult(url, status, list(console_errors), has_heading), links
+
+    def _enqueue(self, links, frontier):
+        for link in links:
+            url = normalize_url(link)
+            if url is None or _origin(url) != self.origin or url in self.visited:
+                continue
+            if not self._budget_left():
+                return
+            if frontier.full():
+                self.report.links_dropped += 1
+                continue
+            self.visited.add(url)
+            frontier.put_nowait(url)
@@ -0,0 +1,313 @@
+"""Long-lived test daemon for near-instant local reruns.
+
+The daemon imports pytest and Playwright once, keeps the Playwright driver
+running and holds a pool of launched browsers.  Clients submit pytest
+arguments (usually node ids) over a Unix socket that only the current user
+can open, and receive one JSON line per test event while the run is in
+progress.  Modules under ``tests/`` and ``utils/`` whose source changed
+since the previous run are dropped from ``sys.modules`` so pytest imports
+the new code.
+
+Usage::
+
+    python -m utils.daemon start                  # run the daemon in the foreground
+    python -m utils.daemon run tests/test_ecommerce.py::test_checkout_validation
+    python -m utils.daemon stop
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOCKET = os.environ.get(
+    "PYTEST_DAEMON_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"pytest-daemon-{os.getuid() if hasattr(os, 'getuid') else 0}.sock"),
+)
+# Only project code is reloaded; a venv inside the project must stay untouched.
+RELOAD_PACKAGES = ("tests", "utils")
+
+
+def _send(sock_file, message):
+    sock_file.write((json.dumps(message) + "\n").encode())
+    sock_file.flush()
+
+
+class Client:
+    """One connection; sending stops quietly once the client has gone away."""
+
+    def __init__(self, sock_file):
+        self.sock_file = sock_file
+        self.connected = True
+
+    def send(self, message):
+        if not self.connected:
+            return
+        try:
+            _send(self.sock_file, message)
+        except OSError:
+            # The run goes on; there is just nobody left to report to.
+            self.connected = False
+
+
+class BrowserPool:
+    """Browsers kept alive between runs, keyed by browser type and launch args."""
+
+    def __init__(self, playwright):
+        self.playwright = playwright
+        self._browsers = {}
+
+    def get(self, browser_type, launch_args):
+        key = (browser_type.name, json.dumps(launch_args, sort_keys=True, default=str))
+        browser = self._browsers.get(key)
+        if browser is None or not browser.is_connected():
+            browser = browser_type.launch(**launch_args)
+            self._browsers[key] = browser
+        return browser
+
+    def close(self):
+        for browser in self._browsers.values():
+            if browser.is_connected():
+                browser.close()
+        self._browsers.clear()
+
+
+class WarmBrowserPlugin:
+    """Serve pytest-playwright's session fixtures from the daemon's pool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @pytest.fixture(scope="session")
+    def playwright(self):
+        return self.pool.playwright
+
+    @pytest.fixture(scope="session")
+    def launch_browser(self, browser_type, browser_type_launch_args):
+        def launch(**kwargs):
+            return self.pool.get(browser_type, {**browser_type_launch_args, **kwargs})
+        return launch
+
+
+class StreamingPlugin:
+    """Forward test progress to the connected client."""
+
+    def __init__(self, client, pool):
+        self.client = client
+        self.pool = pool
+
+    def pytest_configure(self, config):
+        # Registered after the entry-point plugins so these fixtures take
+        # precedence over pytest-playwright's own session fixtures.
+        config.pluginmanager.register(WarmBrowserPlugin(self.pool), "warm-browser")
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self.client.send({"event": "start", "nodeid": nodeid})
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "call" and report.passed:
+            return
+        self.client.send({
+            "event": "report",
+            "nodeid": report.nodeid,
+            "when": report.when,
+            "outcome": report.outcome,
+            "duration": report.duration,
+            "longrepr": str(report.longrepr) if report.failed else None,
+        })
+
+
+class ModuleReloader:
+    """Drop project modules from ``sys.modules`` when their source changes."""
+
+    def __init__(self, root, packages=RELOAD_PACKAGES):
+        self.directories = tuple(os.path.join(os.path.abspath(root), package) + os.sep for package in packages)
+        self._mtimes = {}
+
+    def _project_modules(self):
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if not path or name == __name__:
+                continue
+            path = os.path.abspath(path)
+            if path.startswith(self.directories) and "site-packages" not in path:
+                yield name, path
+
+    def refresh(self):
+        """Return the changed modules; all project modules are dropped if any changed."""
+        modules = dict(self._project_modules())
+        changed = []
+        for name, path in modules.items():
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if self._mtimes.setdefault(name, mtime) != mtime:
+                changed.append(name)
+        if changed:
+            # Drop everything, not just the changed files, so no module keeps
+            # references into a stale copy of another one.
+            for name in modules:
+                del sys.modules[name]
+            self._mtimes.clear()
+        return changed
+
+    def remember(self):
+        """Record modules imported during the last run."""
+        for name, path in self._project_modules():
+            if name not in self._mtimes:
+                try:
+                    self._mtimes[name] = os.stat(path).st_mtime_ns
+                except OSError:
+                    self._mtimes[name] = None
+
+
+def handle(conn, reloader, run):
+    """Serve one client connection; return False when the daemon should stop.
+
+    ``run(args, client)`` runs pytest and returns its exit code.  A malformed
+    request or a client that disconnects only ends that connection.
+    """
+    keep_serving = True
+    try:
+        with conn, conn.makefile("rwb") as sock_file:
+            keep_serving = _handle_request(Client(sock_file), sock_file, reloader, run)
+    except OSError:
+        pass  # the client went away; output still buffered for it is dropped on close
+    return keep_serving
+
+
+def _handle_request(client, sock_file, reloader, run):
+    try:
+        request = json.loads(sock_file.readline() or "{}")
+        if not isinstance(request, dict):
+            raise ValueError("expected a JSON object")
+        args = request.get("args", [])
+        if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            raise ValueError("args must be a list of strings")
+    except (OSError, ValueError) as exc:
+        client.send({"event": "error", "message": f"malformed request: {exc}"})
+        return True
+    if request.get("command") == "stop":
+        client.send({"event": "stopped"})
+        return False
+
+    reloaded = reloader.refresh()
+    if reloaded:
+        client.send({"event": "reloaded", "modules": reloaded})
+    started = time.perf_counter()
+    exit_code = run(args, client)
+    reloader.remember()
+    client.send({
+        "event": "finished",
+        "exit_code": int(exit_code),
+        "duration": time.perf_counter() - started,
+    })
+    return True
+
+
+def _listen(path):
+    if os.path.exists(path):
+        try:
+            socket.socket(socket.AF_UNIX).connect(path)
+        except OSError:
+            os.unlink(path)  # stale socket from a daemon that died
+        else:
+            raise SystemExit(f"A pytest daemon is already listening on {path}")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Anyone who can connect can run arbitrary code through pytest arguments
+    # (-p module), so the socket is created readable by its owner only.
+    previous = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(previous)
+    server.listen()
+    return server
+
+
+def serve(path=DEFAULT_SOCKET):
+    from playwright.sync_api import sync_playwright
+
+    os.chdir(PROJECT_ROOT)
+    playwright = sync_playwright().start()
+    pool = BrowserPool(playwright)
+    reloader = ModuleReloader(PROJECT_ROOT)
+
+    def run(args, client):
+        return pytest.main(args, plugins=[StreamingPlugin(client, pool)])
+
+    server = _listen(path)
+    print(f"pytest daemon listening on {path}", flush=True)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            if not handle(conn, reloader, run):
+                break
+    finally:
+        server.close()
+        os.unlink(path)
+        pool.close()
+        playwright.stop()
+
+
+def submit(message, path=DEFAULT_SOCKET, out=sys.stdout):
+    """Send a request to the daemon, print its events and return the exit code."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        conn.close()
+        print(f"No pytest daemon on {path}; start one with `python -m utils.daemon start`", file=sys.stderr)
+        return 2
+
+    exit_code = 0
+    with conn, conn.makefile("rwb") as sock_file:
+        _send(sock_file, message)
+        for line in sock_file:
+            event = json.loads(line)
+            kind = event["event"]
+            if kind == "report":
+                label = event["outcome"].upper()
+                if event["when"] != "call":
+                    label += f" ({event['when']})"
+                print(f"{label} {event['nodeid']} [{event['duration']:.2f}s]", file=out)
+                if event["longrepr"]:
+                    print(event["longrepr"], file=out)
+            elif kind == "reloaded":
+                print(f"reloaded: {', '.join(event['modules'])}", file=out)
+            elif kind == "error":
+                print(event["message"], file=sys.stderr)
+                exit_code = 2
+            elif kind == "finished":
+                exit_code = event["exit_code"]
+                print(f"finished in {event['duration']:.2f}s (exit code {exit_code})", file=out)
+    return exit_code
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.daemon", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path (PYTEST_DAEMON_SOCKET)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("start", help="run the daemon in the foreground")
+    commands.add_parser("stop", help="stop a running daemon")
+    run = commands.add_parser("run", help="run tests in the daemon")
+    run.add_argument("pytest_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.command == "start":
+        serve(args.socket)
+        return 0
+    if args.command == "stop":
+        return submit({"command": "stop"}, args.socket)
+    return submit({"command": "run", "args": args.pytest_args}, args.socket)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Scoped event handler registry for pages.
+
+Handlers added through the registry belong to a scope and are removed when
+the scope exits, so handlers from one step (or one test on a reused page)
+never keep firing in the next.  Each event gets a single dispatcher on the
+page, attached only while the registry holds handlers for it; this keeps
+Playwright's default of dismissing unhandled dialogs intact.  The registry
+counts how many handler calls each event triggers and can detect listeners
+left on the page.
+"""
+import contextlib
+
+from playwright.sync_api import Page
+
+try:
+    from playwright._impl._page import Page as _PageImpl
+except ImportError:
+    _PageImpl = None
+
+
+def missing_internals():
+    """Private Playwright names leak detection relies on that this version lacks."""
+    if _PageImpl is None:
+        return ["playwright._impl._page.Page"]
+    missing = [f"Page.{name}" for name in ("listeners", "event_names") if not hasattr(_PageImpl, name)]
+    # The sync Page reaches its implementation through _impl_obj, set by a base class
+    if not any("_impl_obj" in cls.__init__.__code__.co_names
+               for cls in Page.__mro__ if "__init__" in vars(cls) and hasattr(cls.__init__, "__code__")):
+        missing.append("Page._impl_obj")
+    return missing
+
+
+class EventRegistry:
+    """Register page event handlers that are removed automatically."""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.emitted = {}
+        self.handler_calls = {}
+        self._handlers = {}
+        self._one_shots = {}
+        self._dispatchers = {}
+        self._scopes = [[]]
+        self._baseline = self.listener_counts()
+
+    def listener_counts(self):
+        """Listeners currently attached to the page, by event name."""
+        # The public API has no way to list listeners; read them from the
+        # underlying event emitter.
+        emitter = getattr(self.page, "_impl_obj", None)
+        if emitter is None or not hasattr(emitter, "event_names"):
+            return {}
+        return {name: len(emitter.listeners(name)) for name in emitter.event_names()}
+
+    def _attach(self, event):
+        if event in self._dispatchers:
+            return
+        handlers = self._handlers.setdefault(event, [])
+        one_shots = self._one_shots.setdefault(event, [])
+
+        def dispatch(*args):
+            self.emitted[event] = self.emitted.get(event, 0) + 1
+            called = list(handlers)
+            if one_shots:
+                called.append(one_shots.pop(0))
+            self.handler_calls[event] = self.handler_calls.get(event, 0) + len(called)
+            for handler in called:
+                handler(*args)
+            self._detach_if_idle(event)
+
+        self.page.on(event, dispatch)
+        self._dispatchers[event] = dispatch
+
+    def _detach_if_idle(self, event):
+        if not self._handlers.get(event) and not self._one_shots.get(event):
+            dispatch = self._dispatchers.pop(event, None)
+            if dispatch is not None and not self.page.is_closed():
+                self.page.remove_listener(event, dispatch)
+
+    def on(self, event, handler):
+        """Call ``handler`` for every ``event`` until the current scope exits."""
+        self._attach(event)
+        self._handlers[event].append(handler)
+        self._scopes[-1].append((event, handler))
+        return handler
+
+    def once(self, event, handler):
+        """Call ``handler`` for one ``event``; one-shot handlers run in registration order."""
+        self._attach(event)
+        self._one_shots[event].append(handler)
+        self._scopes[-1].append((event, handler))
+        return handler
+
+    def accept_next_dialog(self, prompt_text=None):
+        if prompt_text is None:
+            return self.once("dialog", lambda dialog: dialog.accept())
+        return self.once("dialog", lambda dialog: dialog.accept(prompt_text))
+
+    def dismiss_next_dialog(self):
+        return self.once("dialog", lambda dialog: dialog.dismiss())
+
+    @contextlib.contextmanager
+    def scope(self):
+        """Handlers registered inside the block are removed when it exits."""
+        self._scopes.append([])
+        try:
+            yield self
+        finally:
+            self._remove(self._scopes.pop())
+
+    def _remove(self, registrations):
+        for event, handler in registrations:
+            for handlers in (self._handlers.get(event, []), self._one_shots.get(event, [])):
+                if handler in handlers:
+                    handlers.remove(handler)
+            self._detach_if_idle(event)
+
+    def leaked_listeners(self):
+        """Listeners added to the page outside the registry and still attached."""
+        current = self.listener_counts()
+        for event in self._dispatchers:
+            current[event] = current.get(event, 0) - 1
+        return {
+            name: count - self._baseline.get(name, 0)
+            for name, count in current.items()
+            if count > self._baseline.get(name, 0)
+        }
+
+    def close(self):
+        """Remove every registered handler; return the listeners that leaked."""
+        while self._scopes:
+            self._remove(self._scopes.pop())
+        self._scopes = [[]]
+        return {} if self.page.is_closed() else self.leaked_listeners()
+
+    def stats(self):
+        """Per event: times emitted while handled and the handler calls it triggered."""
+        return {
+            event: {"emitted": count, "handler_calls": self.handler_calls.get(event, 0)}
+            for event, count in self.emitted.items()
+        }
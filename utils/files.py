@@ -0,0 +1,136 @@
+"""Staging area for upload and download tests.
+
+Files are staged in a tmpfs-backed directory when one is available and
+has room for them, so large synthetic files never touch a physical disk;
+otherwise they go to the system temp dir.  Generated files are written in
+fixed-size chunks with the SHA-256 digest computed in the same pass.
+Downloads are already written to the staging area by the browser
+(``downloads_path``) and are hashed where they lie, never copied.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from playwright.sync_api import Download, Error
+
+CHUNK_SIZE = 1024 * 1024
+TMPFS_CANDIDATES = ("/dev/shm",)
+# Headroom left on tmpfs for the browser's own shared memory.
+SPACE_MARGIN = 32 * 1024 * 1024
+# A download's size is only known once the browser has written it, so the
+# downloads directory needs room for a large one up front.
+DOWNLOAD_HEADROOM = 1024 * 1024 * 1024
+
+
+def free_space(path):
+    """Bytes available to unprivileged users at ``path``, or None if unknown."""
+    try:
+        stats = os.statvfs(path)
+    except (AttributeError, OSError):
+        return None
+    return stats.f_bavail * stats.f_frsize
+
+
+def tmpfs_root(required=0):
+    """Return a writable tmpfs directory with ``required`` bytes free, or the system temp dir."""
+    for candidate in TMPFS_CANDIDATES:
+        if os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            # Docker's default /dev/shm is only 64 MB
+            available = free_space(candidate)
+            if available is None or available >= required + SPACE_MARGIN:
+                return candidate
+    return tempfile.gettempdir()
+
+
+def _pattern_chunk(seed):
+    # A deterministic, non-repeating-looking block so generated files don't
+    # compress to nothing on the wire.
+    block = bytearray()
+    digest = hashlib.sha256(str(seed).encode()).digest()
+    while len(block) < CHUNK_SIZE:
+        digest = hashlib.sha256(digest).digest()
+        block += digest
+    return bytes(block[:CHUNK_SIZE])
+
+
+class StagedFile:
+    """A file in the staging directory along with its size and digest."""
+
+    def __init__(self, path, size, sha256):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def __repr__(self):
+        return f"StagedFile({self.path!r}, size={self.size}, sha256={self.sha256[:12]}...)"
+
+
+class FileTransfer:
+    """Create upload files and receive downloads in a staging directory."""
+
+    def __init__(self, root=None):
+        self.directory = tempfile.mkdtemp(prefix="transfer-", dir=root or tmpfs_root())
+        self._disk_directory = None
+
+    def _directory_for(self, size):
+        available = free_space(self.directory)
+        if available is None or available >= size + SPACE_MARGIN:
+            return self.directory
+        if self._disk_directory is None:
+            self._disk_directory = tempfile.mkdtemp(prefix="transfer-", dir=tempfile.gettempdir())
+        return self._disk_directory
+
+    def create(self, name, content=None, size=None, seed=0):
+        """Stage a file from ``content`` or generate ``size`` synthetic bytes."""
+        if (content is None) == (size is None):
+            raise ValueError("Pass exactly one of content or size")
+        needed = size if size is not None else len(content)
+        path = os.path.join(self._directory_for(needed), name)
+        sha = hashlib.sha256()
+        written = 0
+        with open(path, "wb") as f:
+            if content is not None:
+                data = content.encode() if isinstance(content, str) else content
+                f.write(data)
+                sha.update(data)
+                written = len(data)
+            else:
+                chunk = _pattern_chunk(seed)
+                view = memoryview(chunk)
+                while written < size:
+                    part = view[:min(CHUNK_SIZE, size - written)]
+                    f.write(part)
+                    sha.update(part)
+                    written += len(part)
+        return StagedFile(path, written, sha.hexdigest())
+
+    def receive(self, download: Download):
+        """Hash a finished download where the browser wrote it."""
+        try:
+            source = download.path()
+        except Error:
+            # Remote browsers don't expose the artifact path; let Playwright
+            # copy the stream into staging and hash the copy instead.
+            target = os.path.join(self._directory_for(DOWNLOAD_HEADROOM), download.suggested_filename)
+            download.save_as(target)
+            return self._hash_existing(target)
+        return self._hash_existing(str(source))
+
+    def _hash_existing(self, path):
+        sha = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+                size += len(chunk)
+        return StagedFile(path, size, sha.hexdigest())
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        if self._disk_directory is not None:
+            shutil.rmtree(self._disk_directory, ignore_errors=True)
@@ -0,0 +1,86 @@
+"""Cached frame resolution for pages with nested frames.
+
+A ``frame_locator`` chain is re-resolved from the top document on every
+action.  ``FrameResolver`` resolves a chain of frame selectors to the
+``Frame`` object once and hands out that frame, so later actions run
+directly in it.  Cached frames are dropped when they, or any frame above
+them, detach or navigate.
+"""
+from playwright.sync_api import Frame, Page
+
+
+class FrameResolver:
+    """Resolve and cache frames by the chain of selectors leading to them."""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # selector chain -> frames along the chain, outermost first
+        self._cache = {}
+        page.on("framedetached", self._invalidate)
+        page.on("framenavigated", self._invalidate)
+
+    def frame(self, *selectors) -> Frame:
+        """Return the frame reached by following ``selectors`` from the main frame."""
+        if not selectors:
+            return self.page.main_frame
+        return self._resolve(tuple(selectors))[-1]
+
+    def locator(self, *selectors):
+        """Locator for ``selectors[-1]`` inside the frame chain ``selectors[:-1]``."""
+        return self.frame(*selectors[:-1]).locator(selectors[-1])
+
+    def _resolve(self, chain):
+        cached = self._cache.get(chain)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        if len(chain) == 1:
+            parents = []
+            parent = self.page.main_frame
+        else:
+            parents = self._resolve(chain[:-1])
+            parent = parents[-1]
+
+        handle = parent.locator(chain[-1]).element_handle()
+        try:
+            frame = handle.content_frame()
+        finally:
+            handle.dispose()
+        if frame is None:
+            raise ValueError(f"Selector {chain[-1]!r} does not match a frame element")
+
+        frames = [*parents, frame]
+        self._cache[chain] = frames
+        return frames
+
+    def _invalidate(self, frame: Frame):
+        if frame == self.page.main_frame:
+            if self._cache:
+                self.invalidations += len(self._cache)
+                self._cache.clear()
+            return
+        stale = [chain for chain, frames in self._cache.items() if frame in frames]
+        for chain in stale:
+            del self._cache[chain]
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self._cache.clear()
+
+    def close(self):
+        self.page.remove_listener("framedetached", self._invalidate)
+        self.page.remove_listener("framenavigated", self._invalidate)
+        self._cache.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "cached": len(self._cache),
+        }
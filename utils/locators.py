@@ -0,0 +1,363 @@
+"""Selector profiling and a static selector lint.
+
+The profiler wraps Playwright's locator actions and assertions for the
+duration of a run.  Every use is counted per selector, and the first few
+uses also time how long the selector takes to resolve inside the page:
+plain CSS is timed with ``querySelectorAll`` in the page itself, other
+selectors (text, role, ``nth=`` and frame chains) and any selector on a
+page whose clock is faked by the ``count()`` round-trip minus an empty
+``evaluate`` round-trip.  Selectors are ranked by
+estimated total resolution time, uses times median cost.
+
+The lint walks test modules with ``ast`` and flags selectors that are
+known to be slow or fragile, with a cheaper role or test-id locator to use
+instead::
+
+    python -m utils.locators tests
+"""
+import argparse
+import ast
+import functools
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+
+import warnings
+
+from playwright.sync_api import Error
+
+try:
+    # The public API has no hook for locator actions; wrap the implementation.
+    from playwright._impl._locator import Locator as _LocatorImpl
+except ImportError:
+    _LocatorImpl = None
+
+TIME_CSS_SCRIPT = """
+([selector, repeat]) => {
+  // A fake clock (page.clock) freezes performance.now; its samples would all be 0.
+  if (!String(performance.now).includes('[native code]')) return null;
+  try {
+    document.querySelectorAll(selector);
+  } catch (e) {
+    return null;  // Not plain CSS; timed by round-trip instead.
+  }
+  let matches = 0;
+  const started = performance.now();
+  for (let i = 0; i < repeat; i++) matches = document.querySelectorAll(selector).length;
+  return { ms: (performance.now() - started) / repeat, matches };
+}
+"""
+
+# Locator methods that resolve the selector in the page.
+PROFILED_METHODS = (
+    "_expect", "all_inner_texts", "all_text_contents", "blur", "check", "clear", "click",
+    "count", "dblclick", "dispatch_event", "element_handle", "element_handles", "evaluate",
+    "evaluate_all", "fill", "focus", "get_attribute", "hover", "inner_html", "inner_text",
+    "input_value", "is_checked", "is_disabled", "is_editable", "is_enabled", "is_hidden",
+    "is_visible", "press", "press_sequentially", "select_option", "set_checked",
+    "set_input_files", "tap", "text_content", "type", "uncheck", "wait_for",
+)
+
+
+def missing_internals():
+    """Private Playwright names the profiler relies on that this version lacks."""
+    if _LocatorImpl is None:
+        return ["playwright._impl._locator.Locator"]
+    missing = [f"Locator.{name}" for name in PROFILED_METHODS if not hasattr(_LocatorImpl, name)]
+    init = getattr(_LocatorImpl.__init__, "__code__", None)
+    for attribute in ("_selector", "_frame"):
+        if init is None or attribute not in init.co_names:
+            missing.append(f"Locator.{attribute}")
+    return missing
+
+
+class SelectorStats:
+    """Uses and in-page resolution samples for one selector."""
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.uses = 0
+        self.actions = {}
+        self.samples = []
+        self.method = None
+        self.matches = None
+        self.modules = set()
+
+    @property
+    def resolve_ms(self):
+        return statistics.median(self.samples) if self.samples else 0.0
+
+    @property
+    def total_ms(self):
+        return self.uses * self.resolve_ms
+
+
+class SelectorProfiler:
+    """Counts locator uses per selector and times how long they take to resolve."""
+
+    def __init__(self, samples_per_selector=3, repeat=20):
+        self.samples_per_selector = samples_per_selector
+        self.repeat = repeat
+        self.stats = {}
+        self.current_test = None
+        self._originals = {}
+
+    @property
+    def installed(self):
+        return bool(self._originals)
+
+    def install(self):
+        """Wrap the locator implementation; affects every page in the process."""
+        if self.installed:
+            return
+        missing = missing_internals()
+        if _LocatorImpl is None or "Locator._selector" in missing or "Locator._frame" in missing:
+            warnings.warn(f"Selector profiling is unavailable with this Playwright version (missing {missing})")
+            return
+        for name in PROFILED_METHODS:
+            original = getattr(_LocatorImpl, name, None)
+            if original is not None:
+                self._originals[name] = original
+                setattr(_LocatorImpl, name, self._wrap(name, original))
+
+    def uninstall(self):
+        for name, original in self._originals.items():
+            setattr(_LocatorImpl, name, original)
+        self._originals.clear()
+
+    def clear(self):
+        self.stats.clear()
+
+    def _wrap(self, name, original):
+        profiler = self
+        action = "expect" if name == "_expect" else name
+
+        @functools.wraps(original)
+        async def profiled(locator, *args, **kwargs):
+            result = await original(locator, *args, **kwargs)
+            await profiler._record(locator, action)
+            return result
+
+        return profiled
+
+    async def _record(self, locator, action):
+        selector = locator._selector
+        stats = self.stats.get(selector)
+        if stats is None:
+            stats = self.stats[selector] = SelectorStats(selector)
+        stats.uses += 1
+        stats.actions[action] = stats.actions.get(action, 0) + 1
+        if self.current_test:
+            stats.modules.add(self.current_test.split("::")[0])
+        if len(stats.samples) < self.samples_per_selector:
+            try:
+                await self._sample(locator, stats)
+            except Error:
+                pass  # The page navigated or closed right after the action.
+
+    async def _sample(self, locator, stats):
+        frame = locator._frame
+        css = stats.selector[4:] if stats.selector.startswith("css=") else stats.selector
+        timing = await frame.evaluate(TIME_CSS_SCRIPT, [css, self.repeat])
+        if timing is not None:
+            stats.method = "dom"
+            stats.matches = timing["matches"]
+            stats.samples.append(timing["ms"])
+            return
+        started = time.perf_counter()
+        await frame.evaluate("0")
+        empty = time.perf_counter() - started
+        started = time.perf_counter()
+        # The unwrapped count() resolves the selector without being recorded as a use
+        stats.matches = await self._originals["count"](locator)
+        elapsed = time.perf_counter() - started
+        stats.method = "round-trip"
+        stats.samples.append(max(0.0, elapsed - empty) * 1000)
+
+    def ranked(self):
+        return sorted(self.stats.values(), key=lambda s: s.total_ms, reverse=True)
+
+    def summary_lines(self, limit=15):
+        ranked = self.ranked()
+        if not ranked:
+            return []
+        lines = [f"{'est. ms':>9} {'uses':>6} {'resolve ms':>11} {'matches':>8}  selector"]
+        for stats in ranked[:limit]:
+            matches = "?" if stats.matches is None else stats.matches
+            lines.append(
+                f"{stats.total_ms:>9.2f} {stats.uses:>6} {stats.resolve_ms:>11.3f} {matches:>8}  "
+                f"{stats.selector} [{stats.method}] ({', '.join(sorted(stats.modules))})"
+            )
+            suggestion = suggest(stats.selector)
+            if suggestion:
+                lines.append(f"{'':>38}try {suggestion}")
+        if len(ranked) > limit:
+            lines.append(f"... and {len(ranked) - limit} more selectors")
+        return lines
+
+
+profiler = SelectorProfiler()
+
+
+# Static lint
+
+# Locator factories whose first argument is a selector.
+SELECTOR_METHODS = {"locator", "query_selector", "query_selector_all", "wait_for_selector", "frame_locator"}
+
+INPUT_ROLES = {
+    "checkbox": "checkbox", "radio": "radio", "number": "spinbutton", "range": "slider",
+    "submit": "button", "button": "button", "search": "searchbox",
+    "text": "textbox", "email": "textbox", "password": "textbox", "tel": "textbox", "url": "textbox",
+}
+TAG_ROLES = {
+    "a": "link", "button": "button", "select": "combobox", "textarea": "textbox", "table": "table",
+    "tr": "row", "td": "cell", "th": "columnheader", "img": "img", "ul": "list", "ol": "list",
+    "li": "listitem", "nav": "navigation", "header": "banner", "footer": "contentinfo",
+    "form": "form", "dialog": "dialog", "main": "main",
+}
+HEADING = re.compile(r"^h([1-6])$")
+TAG = re.compile(r"^[a-z][a-z0-9]*")
+INPUT_TYPE = re.compile(r"""^input\[type=["']?(\w+)["']?\]""")
+
+
+def _role_for(compound):
+    match = INPUT_TYPE.match(compound)
+    if match:
+        return INPUT_ROLES.get(match.group(1))
+    tag = TAG.match(compound)
+    if tag is None:
+        return None
+    heading = HEADING.match(tag.group(0))
+    if heading:
+        return f'heading", level={heading.group(1)}, name="...'
+    return TAG_ROLES.get(tag.group(0))
+
+
+def suggest(selector):
+    """A role or test-id locator that can replace ``selector``, if one is obvious."""
+    if selector.startswith("#"):
+        return None
+    alternatives = [part.strip() for part in selector.split(",")]
+    if len(alternatives) > 1:
+        levels = [HEADING.match(part) for part in alternatives]
+        if all(levels):
+            return 'get_by_role("heading")'
+        return None
+    last = selector.split(" >> ")[0].split()[-1] if selector.split() else selector
+    role = _role_for(last)
+    if role is None:
+        return 'get_by_test_id("...")' if last.startswith((".", "[")) else None
+    if role.startswith("heading"):
+        return f'get_by_role("{role}")'
+    return f'get_by_role("{role}", name="...")'
+
+
+# code, pattern, message
+RULES = (
+    ("SEL001", re.compile(r"\[[\w-]+[\^$*]="),
+     "attribute substring match tests every element's attribute value"),
+    ("SEL002", re.compile(r"^[^\[\]\"']*,"),
+     "selector list is matched once per alternative and ties the test to several markups"),
+    ("SEL003", re.compile(r"(^|>>\s*)(text=|xpath=|//)|:has-text\(|:text\("),
+     "text and XPath engines walk the whole DOM"),
+    ("SEL004", re.compile(r":nth-(child|of-type)|:first-child|:last-child"),
+     "positional CSS breaks when siblings are added"),
+    ("SEL005", re.compile(r"\[(onclick|href)="),
+     "matches on markup details (href/onclick) rather than what the user sees"),
+)
+
+
+class Finding:
+    """One lint result."""
+
+    def __init__(self, path, line, code, message, selector, suggestion=None):
+        self.path = path
+        self.line = line
+        self.code = code
+        self.message = message
+        self.selector = selector
+        self.suggestion = suggestion
+
+    def __str__(self):
+        text = f"{self.path}:{self.line}: {self.code} {self.selector!r}: {self.message}"
+        if self.suggestion:
+            text += f"; try {self.suggestion}"
+        return text
+
+
+def lint_selector(selector, scoped=False):
+    """(code, message) pairs for a selector string; ``scoped`` if chained off another locator."""
+    problems = [(code, message) for code, pattern, message in RULES if pattern.search(selector)]
+    parts = selector.split(" >> ")[0].split()
+    if len(parts) >= 3 and not any(part.startswith("#") for part in parts):
+        problems.append(("SEL006", "long descendant chain without an id anchor"))
+    if not scoped and len(parts) == 1 and TAG.fullmatch(selector) and _role_for(selector):
+        problems.append(("SEL007", f"bare <{selector}> matches every such element on the page"))
+    return problems
+
+
+def _describe(receiver):
+    """The selector (or variable name) an ``nth()`` call is applied to."""
+    if isinstance(receiver, ast.Name):
+        return receiver.id
+    if isinstance(receiver, ast.Call) and isinstance(receiver.func, ast.Attribute) \
+            and receiver.func.attr == "locator" and receiver.args \
+            and isinstance(receiver.args[0], ast.Constant):
+        return receiver.args[0].value
+    return "nth()"
+
+
+def lint_source(source, path="<string>"):
+    findings = []
+    for node in ast.walk(ast.parse(source, path)):
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+            continue
+        method = node.func.attr
+        if method in SELECTOR_METHODS and node.args:
+            arg = node.args[0]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                receiver = node.func.value
+                scoped = not (isinstance(receiver, ast.Name) and receiver.id in ("page", "frame"))
+                for code, message in lint_selector(arg.value, scoped):
+                    findings.append(Finding(path, node.lineno, code, message, arg.value, suggest(arg.value)))
+        elif method == "nth" and node.args and not isinstance(node.args[0], ast.Constant):
+            findings.append(Finding(
+                path, node.lineno, "SEL008",
+                "nth() with a computed index re-resolves the whole list on every call",
+                _describe(node.func.value), "iterating locator.all() or locator.filter(has_text=...)",
+            ))
+    findings.sort(key=lambda finding: finding.line)
+    return findings
+
+
+def lint_paths(paths):
+    findings = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.py"))) if os.path.isdir(path) else [path]
+        for filename in files:
+            with open(filename) as f:
+                findings.extend(lint_source(f.read(), filename))
+    return findings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag slow or fragile selectors in test modules.")
+    parser.add_argument("paths", nargs="*", default=["tests"])
+    args = parser.parse_args(argv)
+
+    findings = lint_paths(args.paths)
+    for finding in findings:
+        print(finding)
+    counts = {}
+    for finding in findings:
+        counts[finding.code] = counts.get(finding.code, 0) + 1
+    if findings:
+        print(f"\n{len(findings)} finding(s): " + ", ".join(f"{code} x{n}" for code, n in sorted(counts.items())))
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
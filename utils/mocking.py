@@ -0,0 +1,262 @@
+"""Declarative route mocking for API-backed pages.
+
+Routes map URL patterns to canned responses, files on disk or Python
+handlers.  All patterns are compiled into a single alternation regex, so a
+request is matched with one regex call no matter how many routes are
+registered; earlier routes win when several patterns match.  The same index
+is registered as the ``page.route`` URL pattern, so the driver lets
+unmatched requests through without a round-trip to Python.  Regex routes
+with inline flags or backreferences can't be joined; when one is present
+the router matches route by route behind a catch-all ``page.route``.  The
+driver reads the URL pattern as a JavaScript regex, so the index is only
+handed to it when every regex sticks to syntax both engines read alike;
+otherwise the index stays in Python behind the catch-all.
+"""
+import hashlib
+import json as jsonlib
+import mimetypes
+import os
+import re
+
+from playwright.sync_api import Page, Request, Route
+
+
+def glob_to_regex(pattern):
+    """Translate a Playwright-style URL glob into a regex source string."""
+    parts = []
+    i = 0
+    in_group = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "*":
+            if pattern.startswith("**", i):
+                parts.append(".*")
+                i += 2
+                continue
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append(".")
+        elif char == "{":
+            parts.append("(?:")
+            in_group = True
+        elif char == "}" and in_group:
+            parts.append(")")
+            in_group = False
+        elif char == "," and in_group:
+            parts.append("|")
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+# Global inline flags, pattern flags and backreferences don't survive being
+# joined with other patterns.
+NOT_COMBINABLE = re.compile(r"\(\?[aiLmsux]+[):]|\(\?P=\w+\)|\\[1-9]")
+# Escapes and group openers JavaScript reads the same way as Python.  Anything
+# else (\A, \Z, (?#...), atomic groups, possessive quantifiers) would silently
+# match differently in the driver or fail to compile there.
+JS_ESCAPES = frozenset("bBdDfnrstvwWSx0u")
+JS_GROUPS = ("?:", "?=", "?!", "?<=", "?<!", "?P<")
+
+
+def js_compatible(source):
+    """Whether a Python regex source means the same as a JavaScript regex."""
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            escaped = source[i + 1:i + 2]
+            if escaped.isalnum() and escaped not in JS_ESCAPES:
+                return False
+            i += 2
+            continue
+        if char == "(" and source.startswith("?", i + 1) and not source.startswith(JS_GROUPS, i + 1):
+            return False
+        if char in "*+?}" and source.startswith("+", i + 1):
+            return False
+        i += 1
+    return True
+
+
+def _etag(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+class MockRoute:
+    """One registered pattern and the response it produces."""
+
+    def __init__(self, pattern, status=200, headers=None, body=None, json=None,
+                 path=None, handler=None, content_type=None):
+        if sum(source is not None for source in (body, json, path, handler)) != 1:
+            raise ValueError("A route needs exactly one of body, json, path or handler")
+        self.pattern = pattern
+        self.status = status
+        self.headers = dict(headers or {})
+        self.path = path
+        self.handler = handler
+        self.content_type = content_type
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._body = None
+        self._etag = None
+        self._mtime = None
+        # Compiled here so a bad pattern fails at add() rather than inside the route handler
+        if isinstance(pattern, re.Pattern):
+            self._matcher = pattern.search  # regexes match anywhere in the URL, as with page.route()
+        else:
+            self._matcher = re.compile(glob_to_regex(pattern)).fullmatch
+
+        if json is not None:
+            self.content_type = content_type or "application/json"
+            self._set_body(jsonlib.dumps(json))
+        elif body is not None:
+            self.content_type = content_type or "text/html"
+            self._set_body(body)
+        elif path is not None:
+            self.content_type = content_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    @property
+    def regex(self):
+        """Source for the combined index, or None if the pattern can't be combined."""
+        if isinstance(self.pattern, re.Pattern):
+            if self.pattern.flags & ~re.UNICODE or NOT_COMBINABLE.search(self.pattern.pattern):
+                return None
+            return f".*(?:{NAMED_GROUP.sub('(?:', self.pattern.pattern)}).*"
+        return glob_to_regex(self.pattern)
+
+    @property
+    def js_compatible(self):
+        """Whether the driver can filter requests with this route's ``regex``."""
+        return not isinstance(self.pattern, re.Pattern) or js_compatible(self.pattern.pattern)
+
+    def matches(self, url):
+        return self._matcher(url) is not None
+
+    def _set_body(self, body):
+        self._body = body.encode() if isinstance(body, str) else body
+        self._etag = _etag(self._body)
+
+    def _load_file(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            self.misses += 1
+            with open(self.path, "rb") as f:
+                self._set_body(f.read())
+            self._mtime = mtime
+
+    def fulfill(self, route: Route, request: Request):
+        self.hits += 1
+        if self.handler is not None:
+            self.misses += 1
+            response = self.handler(request)
+            if response is None:
+                route.continue_()
+            else:
+                route.fulfill(**response)
+            return
+
+        if self.path is not None:
+            self._load_file()
+
+        if request.headers.get("if-none-match") == self._etag:
+            self.not_modified += 1
+            route.fulfill(status=304, headers={**self.headers, "etag": self._etag})
+            return
+
+        route.fulfill(
+            status=self.status,
+            headers={**self.headers, "etag": self._etag},
+            content_type=self.content_type,
+            body=self._body,
+        )
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
+
+
+class MockRouter:
+    """Serve registered routes for a page, falling through to the network."""
+
+    def __init__(self):
+        self.routes = []
+        self.misses = 0
+        self._index = None
+        self._url_filter = None
+        self._compiled = False
+        self._pages = {}
+
+    def add(self, pattern, **response):
+        """Register a route; see ``MockRoute`` for the response options."""
+        route = MockRoute(pattern, **response)
+        self.routes.append(route)
+        self._compiled = False
+        for page in list(self._pages):
+            self._register(page)
+        return route
+
+    def _compile(self):
+        self._index = self._url_filter = None
+        sources = [route.regex for route in self.routes]
+        if sources and None not in sources:
+            try:
+                self._index = re.compile("|".join(f"(?P<r{i}>{source})" for i, source in enumerate(sources)))
+                if all(route.js_compatible for route in self.routes):
+                    self._url_filter = re.compile("^(?:" + "|".join(f"(?:{source})" for source in sources) + ")$")
+            except re.error:
+                # e.g. a group name clashing with the r{i} names; match route by route
+                self._index = self._url_filter = None
+        self._compiled = True
+
+    def match(self, url):
+        """Return the first route whose pattern matches ``url``, or None."""
+        if not self._compiled:
+            self._compile()
+        if self._index is None:
+            return next((route for route in self.routes if route.matches(url)), None)
+        found = self._index.fullmatch(url)
+        if found is None:
+            return None
+        return self.routes[int(found.lastgroup[1:])]
+
+    def handle(self, route: Route, request: Request):
+        mock = self.match(request.url)
+        if mock is None:
+            self.misses += 1
+            route.continue_()
+            return
+        mock.fulfill(route, request)
+
+    def _register(self, page):
+        if not self._compiled:
+            self._compile()
+        previous = self._pages.get(page)
+        if previous is not None and not page.is_closed():
+            page.unroute(previous, self.handle)
+        # With a combined index the driver only sends matching requests to Python
+        url = self._url_filter or "**/*"
+        page.route(url, self.handle)
+        self._pages[page] = url
+
+    def attach(self, page: Page):
+        self._register(page)
+
+    def detach(self):
+        for page, url in self._pages.items():
+            if not page.is_closed():
+                page.unroute(url, self.handle)
+        self._pages.clear()
+
+    def stats(self):
+        """Counters keyed by route pattern.
+
+        ``hits`` counts matched requests, ``misses`` counts responses that
+        were not served from memory (file reloads and handler calls) and
+        ``not_modified`` counts 304 answers to ``If-None-Match``.  Unmatched
+        requests are only counted when the driver can't filter them out.
+        """
+        stats = {str(getattr(route.pattern, "pattern", route.pattern)): route.stats() for route in self.routes}
+        stats["<unmatched>"] = {"hits": 0, "misses": self.misses, "not_modified": 0}
+        return stats
@@ -0,0 +1,169 @@
+"""Web performance metrics collection and budget assertions.
+
+The collector is a small init script registered once per browser context.
+It records navigation timing, largest contentful paint, cumulative layout
+shift, long tasks and transferred bytes through ``PerformanceObserver`` and
+keeps the totals on ``window.__perfMetrics`` so reading them is a single
+``evaluate`` round-trip.
+"""
+import weakref
+
+from playwright.sync_api import expect as _playwright_expect
+from playwright.sync_api import BrowserContext, Page
+
+COLLECTOR_SCRIPT = """
+(() => {
+  if (window.__perfMetrics) return;
+  const metrics = window.__perfMetrics = {
+    lcp_ms: 0, cls: 0, long_tasks: 0, long_task_ms: 0, transfer_bytes: 0,
+  };
+  const observe = (type, callback) => {
+    try {
+      new PerformanceObserver((list) => list.getEntries().forEach(callback))
+        .observe({ type, buffered: true });
+    } catch (e) {
+      // Entry type not supported by this browser.
+    }
+  };
+  observe('largest-contentful-paint', (entry) => {
+    metrics.lcp_ms = entry.startTime;
+  });
+  observe('layout-shift', (entry) => {
+    if (!entry.hadRecentInput) metrics.cls += entry.value;
+  });
+  observe('longtask', (entry) => {
+    metrics.long_tasks += 1;
+    metrics.long_task_ms += entry.duration;
+  });
+  const addTransfer = (entry) => {
+    metrics.transfer_bytes += entry.transferSize || entry.encodedBodySize || 0;
+  };
+  observe('navigation', addTransfer);
+  observe('resource', addTransfer);
+})();
+"""
+
+READ_METRICS_SCRIPT = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  if (!window.__perfMetrics) return null;
+  const metrics = Object.assign({}, window.__perfMetrics);
+  if (nav) {
+    metrics.ttfb_ms = nav.responseStart;
+    metrics.dom_content_loaded_ms = nav.domContentLoadedEventEnd;
+    metrics.load_ms = nav.loadEventEnd;
+  }
+  return metrics;
+}
+"""
+
+# Budget keyword -> (metric name, scale applied to the raw metric)
+BUDGET_METRICS = {
+    "lcp_ms": ("lcp_ms", 1),
+    "cls": ("cls", 1),
+    "transfer_kb": ("transfer_bytes", 1 / 1024),
+    "long_task_ms": ("long_task_ms", 1),
+    "long_tasks": ("long_tasks", 1),
+    "ttfb_ms": ("ttfb_ms", 1),
+    "dom_content_loaded_ms": ("dom_content_loaded_ms", 1),
+    "load_ms": ("load_ms", 1),
+}
+
+_instrumented_contexts = weakref.WeakSet()
+
+
+def install_collector(context: BrowserContext):
+    """Register the metrics collector on a context, at most once."""
+    if context in _instrumented_contexts:
+        return
+    context.add_init_script(COLLECTOR_SCRIPT)
+    _instrumented_contexts.add(context)
+
+
+def collect_metrics(page: Page):
+    """Return the metrics gathered so far for the current document."""
+    page.wait_for_load_state("load")
+    metrics = page.evaluate(READ_METRICS_SCRIPT)
+    if metrics is None:
+        # Without the collector every metric would read 0 and any budget would pass
+        raise RuntimeError(
+            f"No performance collector on {page.url}; use the page from the 'page' fixture "
+            "or call install_collector(context) before opening the page"
+        )
+    metrics["transfer_kb"] = metrics.get("transfer_bytes", 0) / 1024
+    return metrics
+
+
+class PerformanceReport:
+    """Per-session aggregation of every budget check."""
+
+    def __init__(self):
+        self.entries = []
+        self.current_test = None
+
+    def add(self, url, metrics, budget, failures):
+        self.entries.append({
+            "test": self.current_test,
+            "url": url,
+            "metrics": metrics,
+            "budget": budget,
+            "passed": not failures,
+        })
+
+    def summary_lines(self):
+        lines = []
+        for entry in self.entries:
+            metrics = entry["metrics"]
+            status = "PASS" if entry["passed"] else "FAIL"
+            lines.append(
+                f"{status} {entry['url']} "
+                f"lcp={metrics.get('lcp_ms', 0):.0f}ms "
+                f"cls={metrics.get('cls', 0):.3f} "
+                f"transfer={metrics.get('transfer_kb', 0):.1f}KB "
+                f"long_tasks={metrics.get('long_tasks', 0)} "
+                f"({entry['test']})"
+            )
+        return lines
+
+
+report = PerformanceReport()
+
+
+class PagePerformanceAssertions:
+    """Playwright page assertions extended with ``to_meet_budget``."""
+
+    def __init__(self, page: Page, message=None):
+        self._page = page
+        self._message = message
+        self._assertions = _playwright_expect(page, message)
+
+    def __getattr__(self, name):
+        return getattr(self._assertions, name)
+
+    def to_meet_budget(self, **budget):
+        unknown = set(budget) - set(BUDGET_METRICS)
+        if unknown:
+            raise ValueError(f"Unknown budget metrics: {', '.join(sorted(unknown))}")
+
+        metrics = collect_metrics(self._page)
+        failures = []
+        for key, limit in budget.items():
+            name, scale = BUDGET_METRICS[key]
+            actual = metrics.get(name, 0) * scale
+            if actual > limit:
+                failures.append(f"{key}={actual:.3f} exceeds budget {limit}")
+
+        report.add(self._page.url, metrics, budget, failures)
+        if failures:
+            prefix = f"{self._message}: " if self._message else ""
+            raise AssertionError(
+                f"{prefix}Performance budget exceeded on {self._page.url}: "
+                + "; ".join(failures)
+            )
+
+
+def expect(actual, message=None):
+    """Drop-in replacement for Playwright's ``expect`` with budget support."""
+    if isinstance(actual, Page):
+        return PagePerformanceAssertions(actual, message)
+    return _playwright_expect(actual, message)
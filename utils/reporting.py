@@ -0,0 +1,187 @@
+"""Structured result streaming to JSON lines and JUnit XML.
+
+Test events are turned into small dicts on the pytest thread and handed to a
+background writer thread, which batches them into single writes to a file
+or a local socket.  Under pytest-xdist the plugin runs only on the
+controller, which already receives every worker's reports, so one writer
+serves the whole run.
+"""
+import json
+import os
+import queue
+import re
+import socket
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+FSYNC_MODES = ("none", "batch")
+# Characters XML 1.0 can't represent, e.g. ANSI escapes in assertion messages.
+XML_ILLEGAL = re.compile("[^\u0009\u000A\u000D\u0020-\u007E\u0080-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]")
+
+
+def xml_escape(text):
+    """Replace XML-illegal characters with ``#xNN``, as pytest's own JUnit writer does."""
+    return XML_ILLEGAL.sub(lambda match: f"#x{ord(match.group()):02X}", text)
+
+
+class EventWriter:
+    """Write JSON lines from a background thread in batches."""
+
+    def __init__(self, target, fsync="none", batch_size=256, flush_interval=0.2):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_MODES)}")
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._sock = None
+        self._fd = None
+        self._open(target)
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def _open(self, target):
+        if target.startswith("unix:"):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(target[len("unix:"):])
+        elif target.startswith("tcp:"):
+            host, port = target[len("tcp:"):].rsplit(":", 1)
+            self._sock = socket.create_connection((host, int(port)))
+        else:
+            directory = os.path.dirname(os.path.abspath(target))
+            os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def emit(self, event):
+        self._queue.put(event)
+
+    def _run(self):
+        closing = False
+        while not closing:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                closing = True
+                batch.pop()
+            if batch:
+                self._write(b"".join(json.dumps(event).encode() + b"\n" for event in batch))
+
+    def _write(self, data):
+        if self._sock is not None:
+            self._sock.sendall(data)
+            return
+        os.write(self._fd, data)
+        if self.fsync == "batch":
+            os.fsync(self._fd)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._sock is not None:
+            self._sock.close()
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+
+
+class ResultStreamPlugin:
+    """Stream test events as JSON lines and write JUnit XML at the end."""
+
+    def __init__(self, target=None, junit_path=None, fsync="none"):
+        self.writer = EventWriter(target, fsync=fsync) if target else None
+        self.junit_path = junit_path
+        self.results = {}
+        self._session_start = None
+
+    def _emit(self, event, **fields):
+        if self.writer is not None:
+            fields["event"] = event
+            fields["ts"] = time.time()
+            self.writer.emit(fields)
+
+    def pytest_sessionstart(self, session):
+        self._session_start = time.time()
+        self._emit("session_start")
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self._emit("start", nodeid=nodeid)
+
+    def pytest_runtest_logreport(self, report):
+        worker = getattr(getattr(report, "node", None), "gateway", None)
+        # record_property("artifact", path), and pytest-playwright's screenshots,
+        # traces and videos (see the playwright_artifacts fixture)
+        artifacts = [value for name, value in report.user_properties if name == "artifact"]
+        self._emit(
+            "phase",
+            nodeid=report.nodeid,
+            phase=report.when,
+            outcome=report.outcome,
+            duration=report.duration,
+            worker=worker.id if worker else None,
+            artifacts=artifacts,
+        )
+
+        result = self.results.setdefault(report.nodeid, {"phases": {}, "outcome": "passed", "message": None, "artifacts": []})
+        result["phases"][report.when] = report.duration
+        if report.failed:
+            result["outcome"] = "failed" if report.when == "call" else "error"
+            result["message"] = report.longreprtext
+        elif report.skipped and result["outcome"] == "passed":
+            result["outcome"] = "skipped"
+            result["message"] = report.longreprtext
+        result["artifacts"].extend(path for path in artifacts if path not in result["artifacts"])
+
+    def pytest_runtest_logfinish(self, nodeid, location):
+        result = self.results.get(nodeid)
+        if result is not None:
+            self._emit(
+                "finish",
+                nodeid=nodeid,
+                outcome=result["outcome"],
+                duration=sum(result["phases"].values()),
+                phases=result["phases"],
+                artifacts=result["artifacts"],
+            )
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self._emit("session_finish", exit_status=int(exitstatus), duration=time.time() - self._session_start)
+        if self.writer is not None:
+            self.writer.close()
+        if self.junit_path:
+            self.write_junit(self.junit_path)
+
+    def write_junit(self, path):
+        suite = ET.Element("testsuite", name="pytest")
+        counts = {"failed": 0, "error": 0, "skipped": 0}
+        total_time = 0.0
+        for nodeid, result in self.results.items():
+            module, _, name = nodeid.rpartition("::")
+            duration = sum(result["phases"].values())
+            total_time += duration
+            if module.endswith(".py"):
+                module = module[:-3]
+            case = ET.SubElement(suite, "testcase", classname=xml_escape(module.replace("/", ".")),
+                                 name=xml_escape(name), time=f"{duration:.3f}")
+            outcome = result["outcome"]
+            if outcome in counts:
+                counts[outcome] += 1
+                tag = "failure" if outcome == "failed" else outcome
+                message = xml_escape(result["message"] or "")
+                lines = message.strip().splitlines()
+                element = ET.SubElement(case, tag, message=lines[-1] if lines else "")
+                element.text = message
+        suite.set("tests", str(len(self.results)))
+        suite.set("failures", str(counts["failed"]))
+        suite.set("errors", str(counts["error"]))
+        suite.set("skipped", str(counts["skipped"]))
+        suite.set("time", f"{total_time:.3f}")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
@@ -0,0 +1,252 @@
+"""Memory-aware scheduling of the browser lifecycle.
+
+The scheduler keeps test starts within what the host can hold: before a
+test it waits for one of a limited number of host-wide context slots,
+sized from total memory and shared by every worker process through lock
+files, and for enough free memory as long as other tests hold slots
+whose release could free some.  After each test it recycles the browser once it has served too
+many tests or its process tree has grown too much.  Memory is read with
+psutil when installed and from ``/proc`` otherwise; on platforms with
+neither, memory limits are skipped.
+"""
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: slots are limited per process only
+    fcntl = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def available_memory():
+    """Bytes of memory available to new processes, or None if unknown."""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def total_memory():
+    """Total bytes of physical memory, or None if unknown."""
+    if psutil is not None:
+        return psutil.virtual_memory().total
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _proc_children():
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def child_process_rss(pid=None):
+    """Total RSS in bytes of all descendants of ``pid`` (the Playwright driver and browsers)."""
+    pid = pid or os.getpid()
+    if psutil is not None:
+        total = 0
+        for child in psutil.Process(pid).children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    if not os.path.isdir("/proc"):
+        return None
+    children = _proc_children()
+    total = 0
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        total += _proc_rss(child)
+        pending.extend(children.get(child, []))
+    return total
+
+
+class ContextSlots:
+    """Host-wide limit on concurrent contexts, shared through lock files."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "playwright-context-slots")
+        os.makedirs(self.directory, exist_ok=True)
+        self._held = None
+
+    def try_acquire(self, limit):
+        for index in range(limit):
+            fd = os.open(os.path.join(self.directory, f"slot-{index}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is None:
+                self._held = fd
+                return True
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            self._held = fd
+            return True
+        return False
+
+    def busy(self):
+        """Number of slots currently held by any process."""
+        if fcntl is None:
+            return 0
+        count = 0
+        for name in os.listdir(self.directory):
+            if not (name.startswith("slot-") and name.endswith(".lock")):
+                continue
+            try:
+                fd = os.open(os.path.join(self.directory, name), os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                count += 1
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+        return count
+
+    def release(self):
+        if self._held is not None:
+            if fcntl is not None:
+                fcntl.flock(self._held, fcntl.LOCK_UN)
+            os.close(self._held)
+            self._held = None
+
+
+class BrowserScheduler:
+    """Hand out a browser per test, with backpressure and recycling."""
+
+    def __init__(self, launch, max_tests_per_browser=100, max_growth_mb=512,
+                 min_free_mb=1024, context_mb=250, max_contexts=0,
+                 poll_interval=0.5, max_wait=300, slots=None):
+        self.launch = launch
+        self.max_tests_per_browser = max_tests_per_browser
+        self.max_growth_mb = max_growth_mb
+        self.min_free_mb = min_free_mb
+        self.context_mb = context_mb
+        self.max_contexts = max_contexts
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.slots = slots or ContextSlots()
+        self.browser = None
+        self.tests_on_browser = 0
+        self.baseline_rss = 0
+        self.peak_rss = 0
+        self.recycles = {"tests": 0, "memory": 0}
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.forced_starts = 0
+        self.low_memory_starts = 0
+
+    def _context_limit(self):
+        limit = self.max_contexts or os.cpu_count() or 1
+        total = total_memory()
+        if total is not None:
+            # Slots are sized from total memory: running contexts have already
+            # used up part of what is free now, so free memory would undercount.
+            usable_mb = total / MB - self.min_free_mb
+            limit = min(limit, max(1, int(usable_mb / self.context_mb)))
+        return limit
+
+    def _wait_for_capacity(self):
+        started = time.perf_counter()
+        waited = False
+        while True:
+            available = available_memory()
+            enough_memory = available is None or available / MB >= self.min_free_mb
+            limit = self._context_limit()
+            if enough_memory and self.slots.try_acquire(limit):
+                break
+            if not enough_memory and not self.slots.busy():
+                # No other test holds memory that waiting could free; start now.
+                self.slots.try_acquire(limit)
+                self.low_memory_starts += 1
+                break
+            if time.perf_counter() - started >= self.max_wait:
+                # Don't stall the run forever; start anyway and count it.
+                self.forced_starts += 1
+                break
+            waited = True
+            time.sleep(self.poll_interval)
+        if waited:
+            self.waits += 1
+            self.wait_seconds += time.perf_counter() - started
+
+    def _sample_rss(self):
+        rss = child_process_rss() or 0
+        self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def acquire(self):
+        """Block until the host has room for another context; return the browser."""
+        self._wait_for_capacity()
+        if self.browser is None or not self.browser.is_connected():
+            self.browser = self.launch()
+            self.tests_on_browser = 0
+            self.baseline_rss = self._sample_rss()
+        return self.browser
+
+    def release(self):
+        """Free the context slot and recycle the browser if it has worn out."""
+        self.slots.release()
+        self.tests_on_browser += 1
+        rss = self._sample_rss()
+        reason = None
+        if self.max_tests_per_browser and self.tests_on_browser >= self.max_tests_per_browser:
+            reason = "tests"
+        elif self.max_growth_mb and (rss - self.baseline_rss) / MB >= self.max_growth_mb:
+            reason = "memory"
+        if reason and self.browser is not None:
+            self.browser.close()
+            self.browser = None
+            self.recycles[reason] += 1
+
+    def summary(self):
+        return (
+            f"peak Playwright process RSS {self.peak_rss / MB:.0f} MB, "
+            f"{sum(self.recycles.values())} browser recycle(s) "
+            f"({self.recycles['tests']} by test count, {self.recycles['memory']} by memory growth), "
+            f"{self.waits} start(s) delayed for {self.wait_seconds:.1f}s, "
+            f"{self.forced_starts} forced after waiting {self.max_wait}s, "
+            f"{self.low_memory_starts} started below the free-memory floor with nothing to wait for"
+        )
@@ -0,0 +1,31 @@
+"""Local static file server for offline tests and benchmarks."""
+import contextlib
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline stand-in pages for the-internet
+SITE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "site")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_directory(directory=SITE_DIR, host="127.0.0.1", port=0):
+    """Serve ``directory`` over HTTP in a background thread and yield its base URL.
+
+    Defaults to the stand-in site in ``tests/site``.
+    """
+    handler = functools.partial(QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,352 @@
+"""Split the suite across CI agents and merge their results.
+
+``pytest --shard=i/N`` keeps the i-th of N shards of the collected suite.
+Shards are balanced with recorded test durations: tests are handed out
+longest first, each to the shard with the least total time so far, and
+run in their collected order.  Tests without a recorded duration count as
+the median of the known ones.  Every shard writes a self-contained bundle
+directory::
+
+    shard-results/shard-2-of-4/
+        manifest.json    shard, assigned tests, wall time, environment
+        results.jsonl    event stream (see utils.reporting)
+        junit.xml
+        timings.json     per-test outcome and phase durations
+        artifacts/       files attached with record_property("artifact", path)
+
+``merge`` combines bundles into one report and updates the duration
+history that the next run balances with; ``run`` starts N local shard
+processes and merges them, for trying sharding on one machine::
+
+    python -m utils.sharding merge shard-results/shard-*
+    python -m utils.sharding run 4 -- -m smoke
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from utils.reporting import ResultStreamPlugin
+
+DEFAULT_DURATIONS = ".test-durations.json"
+DEFAULT_RESULTS_DIR = "shard-results"
+# Weight of the newest run in the duration history.
+HISTORY_WEIGHT = 0.5
+
+
+def parse_shard(value):
+    """Parse ``i/N`` (1-based) into ``(i, N)``."""
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {total}, got {index}")
+    return index, total
+
+
+def load_durations(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("durations", {})
+
+
+def save_durations(path, durations):
+    with open(path, "w") as f:
+        json.dump({"updated": time.strftime("%Y-%m-%dT%H:%M:%S"), "durations": durations},
+                  f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def partition(nodeids, durations, count):
+    """Split ``nodeids`` into ``count`` lists with similar total duration."""
+    known = [durations[nodeid] for nodeid in nodeids if nodeid in durations]
+    default = statistics.median(known) if known else 1.0
+    order = {nodeid: position for position, nodeid in enumerate(nodeids)}
+    shards = [[] for _ in range(count)]
+    loads = [0.0] * count
+    # Longest first onto the least loaded shard; ties broken by node id so
+    # every agent computes the same split.
+    for nodeid in sorted(nodeids, key=lambda n: (-durations.get(n, default), n)):
+        target = min(range(count), key=lambda i: (loads[i], i))
+        shards[target].append(nodeid)
+        loads[target] += durations.get(nodeid, default)
+    return [sorted(shard, key=order.__getitem__) for shard in shards]
+
+
+class ShardPlugin:
+    """Keep one shard of the collected tests and write its result bundle."""
+
+    def __init__(self, index, total, durations_path, results_dir, write_bundle=True):
+        self.index = index
+        self.total = total
+        self.durations_path = durations_path
+        self.bundle = os.path.join(results_dir, f"shard-{index}-of-{total}")
+        self.write_bundle = write_bundle
+        self.assigned = []
+        self.stream = None
+        self._started = None
+
+    def pytest_configure(self, config):
+        # xdist workers only select their tests; the controller writes the bundle
+        if not self.write_bundle:
+            return
+        # A stale bundle from an earlier run would be merged as if it were new
+        shutil.rmtree(self.bundle, ignore_errors=True)
+        os.makedirs(self.bundle)
+        self.stream = ResultStreamPlugin(os.path.join(self.bundle, "results.jsonl"),
+                                         os.path.join(self.bundle, "junit.xml"))
+        config.pluginmanager.register(self.stream, "shard-result-stream")
+
+    def pytest_sessionstart(self, session):
+        self._started = time.time()
+
+    def pytest_collection_modifyitems(self, config, items):
+        durations = load_durations(self.durations_path)
+        shards = partition([item.nodeid for item in items], durations, self.total)
+        keep = set(shards[self.index - 1])
+        selected = [item for item in items if item.nodeid in keep]
+        deselected = [item for item in items if item.nodeid not in keep]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+        self.assigned = [item.nodeid for item in selected]
+
+    def _collect_artifacts(self, results):
+        directory = os.path.join(self.bundle, "artifacts")
+        copied_count = 0
+        for result in results.values():
+            copied = []
+            for path in result.get("artifacts") or []:
+                if not os.path.isfile(path):
+                    continue
+                # Prefixed with a counter: different tests may attach files with the same name
+                name = f"{copied_count}-{os.path.basename(path)}"
+                copied_count += 1
+                os.makedirs(directory, exist_ok=True)
+                shutil.copy2(path, os.path.join(directory, name))
+                copied.append(os.path.join("artifacts", name))
+            result["artifacts"] = copied
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if not self.write_bundle:
+            return
+        results = {nodeid: dict(result) for nodeid, result in self.stream.results.items()}
+        self._collect_artifacts(results)
+        timings = {
+            nodeid: {
+                "outcome": result["outcome"],
+                "duration": sum(result["phases"].values()),
+                "phases": result["phases"],
+                "artifacts": result["artifacts"],
+            }
+            for nodeid, result in results.items()
+        }
+        with open(os.path.join(self.bundle, "timings.json"), "w") as f:
+            json.dump(timings, f, indent=1)
+        manifest = {
+            "shard": self.index,
+            "total": self.total,
+            # Under xdist the controller never collects; use what its workers ran
+            "tests": self.assigned or list(results),
+            "exit_status": int(exitstatus),
+            "started": self._started,
+            "wall_time": time.time() - self._started,
+            "host": socket.gethostname(),
+            "python": platform.python_version(),
+        }
+        with open(os.path.join(self.bundle, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=1)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.write_bundle:
+            return
+        terminalreporter.write_sep("=", f"shard {self.index}/{self.total}")
+        terminalreporter.write_line(f"{len(self.stream.results)} test(s), bundle written to {self.bundle}")
+
+
+def _load_bundle(path):
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    with open(os.path.join(path, "timings.json")) as f:
+        timings = json.load(f)
+    return manifest, timings
+
+
+def _prepare_output(output, bundles):
+    """Empty ``output`` for a new merge, refusing anything that isn't safe to delete."""
+    target = os.path.realpath(output)
+    for bundle in bundles:
+        source = os.path.realpath(bundle)
+        if os.path.commonpath([target, source]) in (target, source):
+            raise ValueError(f"output {output} overlaps shard bundle {bundle}")
+    if os.path.exists(output):
+        if not os.path.isdir(output):
+            raise ValueError(f"output {output} exists and is not a directory")
+        if os.listdir(output) and not os.path.exists(os.path.join(output, "summary.json")):
+            raise ValueError(f"output {output} is not empty and is not an earlier merge; "
+                             "remove it or pick another --output")
+        shutil.rmtree(output)
+    os.makedirs(output)
+
+
+def merge(bundles, output, durations_path=DEFAULT_DURATIONS):
+    """Combine shard bundles into ``output``; return the merged summary."""
+    # A shard that crashed leaves a bundle without a manifest; it counts as missing
+    incomplete = [path for path in bundles if not os.path.exists(os.path.join(path, "manifest.json"))]
+    loaded = sorted((_load_bundle(path) + (path,) for path in bundles if path not in incomplete),
+                    key=lambda b: b[0]["shard"])
+    if not loaded:
+        raise ValueError("no shard bundles to merge")
+    totals = {manifest["total"] for manifest, _, _ in loaded}
+    if len(totals) != 1:
+        raise ValueError(f"bundles come from different shard counts: {sorted(totals)}")
+    total = totals.pop()
+    shard_ids = [manifest["shard"] for manifest, _, _ in loaded]
+    missing = sorted(set(range(1, total + 1)) - set(shard_ids))
+    duplicated = sorted({shard for shard in shard_ids if shard_ids.count(shard) > 1})
+
+    _prepare_output(output, bundles)
+    timings = {}
+    suites = ET.Element("testsuites")
+    shards = []
+    with open(os.path.join(output, "results.jsonl"), "w") as merged_events:
+        for manifest, shard_timings, path in loaded:
+            shard = manifest["shard"]
+            with open(os.path.join(path, "results.jsonl")) as f:
+                for line in f:
+                    event = json.loads(line)
+                    event["shard"] = shard
+                    merged_events.write(json.dumps(event) + "\n")
+            junit = os.path.join(path, "junit.xml")
+            if os.path.exists(junit):
+                suite = ET.parse(junit).getroot()
+                suite.set("name", f"shard-{shard}-of-{total}")
+                suites.append(suite)
+            if os.path.isdir(os.path.join(path, "artifacts")):
+                shutil.copytree(os.path.join(path, "artifacts"), os.path.join(output, "artifacts", f"shard-{shard}"))
+            for nodeid, timing in shard_timings.items():
+                timing["shard"] = shard
+                timing["artifacts"] = [os.path.join("artifacts", f"shard-{shard}", os.path.relpath(a, "artifacts"))
+                                       for a in timing["artifacts"]]
+                timings[nodeid] = timing
+            shards.append({
+                "shard": shard,
+                "tests": len(manifest["tests"]),
+                "test_time": sum(t["duration"] for t in shard_timings.values()),
+                "wall_time": manifest["wall_time"],
+                "exit_status": manifest["exit_status"],
+            })
+    ET.ElementTree(suites).write(os.path.join(output, "junit.xml"), encoding="utf-8", xml_declaration=True)
+    with open(os.path.join(output, "timings.json"), "w") as f:
+        json.dump(timings, f, indent=1)
+
+    history = load_durations(durations_path)
+    for nodeid, timing in timings.items():
+        if timing["outcome"] == "skipped":
+            continue
+        previous = history.get(nodeid)
+        history[nodeid] = timing["duration"] if previous is None else \
+            HISTORY_WEIGHT * timing["duration"] + (1 - HISTORY_WEIGHT) * previous
+    save_durations(durations_path, history)
+
+    outcomes = {}
+    for timing in timings.values():
+        outcomes[timing["outcome"]] = outcomes.get(timing["outcome"], 0) + 1
+    wall_times = [shard["wall_time"] for shard in shards]
+    summary = {
+        "total": total,
+        "shards": shards,
+        "missing_shards": missing,
+        "duplicated_shards": duplicated,
+        "incomplete_bundles": incomplete,
+        "tests": len(timings),
+        "outcomes": outcomes,
+        "wall_time": max(wall_times),
+        # Slowest shard relative to the average; 1.0 is a perfect split.
+        "imbalance": max(wall_times) / statistics.mean(wall_times) if statistics.mean(wall_times) else 1.0,
+    }
+    with open(os.path.join(output, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=1)
+    return summary
+
+
+def print_summary(summary, output):
+    print(f"{'shard':<8}{'tests':>7}{'test s':>10}{'wall s':>10}{'exit':>6}")
+    for shard in summary["shards"]:
+        print(f"{shard['shard']:<8}{shard['tests']:>7}{shard['test_time']:>10.1f}"
+              f"{shard['wall_time']:>10.1f}{shard['exit_status']:>6}")
+    outcomes = ", ".join(f"{count} {outcome}" for outcome, count in sorted(summary["outcomes"].items()))
+    print(f"\n{summary['tests']} test(s): {outcomes}")
+    print(f"wall time {summary['wall_time']:.1f}s, imbalance {summary['imbalance']:.2f}")
+    if summary["missing_shards"]:
+        print(f"missing shard(s): {summary['missing_shards']}")
+    if summary["duplicated_shards"]:
+        print(f"duplicated shard(s): {summary['duplicated_shards']}")
+    if summary["incomplete_bundles"]:
+        print(f"bundle(s) without a manifest: {', '.join(summary['incomplete_bundles'])}")
+    print(f"merged report written to {output}")
+
+
+def _exit_status(summary):
+    failed = summary["outcomes"].get("failed", 0) + summary["outcomes"].get("error", 0)
+    incomplete = summary["missing_shards"] or summary["duplicated_shards"]
+    return 1 if failed or incomplete or any(s["exit_status"] not in (0, 5) for s in summary["shards"]) else 0
+
+
+def run_local(count, pytest_args, results_dir=DEFAULT_RESULTS_DIR, durations_path=DEFAULT_DURATIONS):
+    """Run ``count`` shard processes side by side on this machine and merge them."""
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "pytest", f"--shard={index}/{count}",
+                          f"--shard-dir={results_dir}", f"--shard-durations={durations_path}",
+                          *pytest_args],
+                         stdout=subprocess.DEVNULL)
+        for index in range(1, count + 1)
+    ]
+    for process in processes:
+        process.wait()
+    bundles = [os.path.join(results_dir, f"shard-{index}-of-{count}") for index in range(1, count + 1)]
+    return merge([b for b in bundles if os.path.isdir(b)], os.path.join(results_dir, "merged"), durations_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge shard bundles or run shards locally.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge_parser = commands.add_parser("merge", help="combine shard bundles into one report")
+    merge_parser.add_argument("bundles", nargs="+")
+    merge_parser.add_argument("--output", default=os.path.join(DEFAULT_RESULTS_DIR, "merged"))
+    merge_parser.add_argument("--durations", default=DEFAULT_DURATIONS)
+    run_parser = commands.add_parser("run", help="run N shard processes on this machine and merge them")
+    run_parser.add_argument("shards", type=int)
+    run_parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    run_parser.add_argument("--durations", default=DEFAULT_DURATIONS)
+    run_parser.add_argument("pytest_args", nargs=argparse.REMAINDER, help="arguments for pytest, after --")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "merge":
+            bundles = [path for pattern in args.bundles for path in sorted(glob.glob(pattern)) or [pattern]]
+            output = args.output
+            summary = merge(bundles, output, args.durations)
+        else:
+            pytest_args = args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+            output = os.path.join(args.results_dir, "merged")
+            summary = run_local(args.shards, pytest_args, args.results_dir, args.durations)
+    except ValueError as e:
+        print(f"Not merged: {e}", file=sys.stderr)
+        return 2
+    print_summary(summary, output)
+    return _exit_status(summary)
+
+
+if __name__ == "__main__":
+    sys.exit(main())